@@ -0,0 +1,294 @@
+import asyncio
+import inspect
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+
+from metrics import METRICS
+from people_api import error_status
+
+API_CONCURRENCY = 4
+# People API default per-user quotas; raise them if the Cloud project has more
+READ_QUOTA_PER_MINUTE = 90
+WRITE_QUOTA_PER_MINUTE = 60
+MAX_RETRIES = 6
+BACKOFF_BASE = 1.0  # seconds
+BACKOFF_MAX = 64.0  # seconds
+# "httplib2" (googleapiclient, a connection per worker thread) or "asyncio" (async_people,
+# one event loop multiplexing a pool of keep-alive connections)
+PEOPLE_TRANSPORT = os.environ.get("BIRTHDAY_SYNC_TRANSPORT", "httplib2")
+TRANSPORTS = ("httplib2", "asyncio")
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# A create that failed any other way (500, timeout, dropped connection) may still have
+# gone through; resending it could duplicate contacts, so only these are retried
+CREATE_RETRY_STATUSES = {429, 503}
+CREATE_METHODS = {"createContact", "batchCreateContacts"}
+WRITE_METHODS = {
+    "createContact",
+    "updateContact",
+    "deleteContact",
+    "batchCreateContacts",
+    "batchUpdateContacts",
+    "batchDeleteContacts",
+}
+
+
+def is_retryable(error, name=None):
+    # Quota (429), transient server errors and dropped connections; creates only when
+    # the server says it did not process them
+    if name in CREATE_METHODS:
+        return error_status(error) in CREATE_RETRY_STATUSES
+    if error_status(error) in RETRY_STATUSES:
+        return True
+    return isinstance(error, (ConnectionError, TimeoutError))
+
+
+def retry_after(error):
+    # Seconds requested by a Retry-After header (delta-seconds or HTTP date), if any
+    resp = getattr(error, "resp", None)
+    value = resp.get("retry-after") if hasattr(resp, "get") else None
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    # Thread-safe rate limiter; callers reserve a token and sleep off any deficit
+
+    def __init__(self, rate_per_minute, burst=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1.0, rate_per_minute / 10)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.last = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def reserve(self):
+        # Take a token; returns the seconds to wait before using it
+        with self.lock:
+            self._refill()
+            self.tokens -= 1
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait:
+            self.sleep(wait)
+
+    def pause(self, seconds):
+        # Hold every caller back for `seconds` (used when the server asks us to slow down)
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class ApiExecutor:
+    # Runs People API requests with per-minute rate limits, jittered exponential
+    # backoff on 429/5xx, and a bounded worker pool for concurrent batches
+
+    def __init__(
+        self,
+        max_workers=API_CONCURRENCY,
+        read_per_minute=READ_QUOTA_PER_MINUTE,
+        write_per_minute=WRITE_QUOTA_PER_MINUTE,
+        max_retries=MAX_RETRIES,
+        backoff_base=BACKOFF_BASE,
+        backoff_max=BACKOFF_MAX,
+        http_factory=None,
+        sleep=time.sleep,
+    ):
+        self.max_workers = max_workers
+        self.read_bucket = TokenBucket(read_per_minute, sleep=sleep)
+        self.write_bucket = TokenBucket(write_per_minute, sleep=sleep)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # httplib2 connections are not thread-safe: each worker gets its own
+        self.http_factory = http_factory
+        self.sleep = sleep
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._local = threading.local()
+        self.retries = 0
+        # Closed on shutdown(), e.g. an AsyncPeopleClient's event loop and connections
+        self.transport = None
+
+    def _http(self):
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = self._local.http = self.http_factory()
+        return http
+
+    def backoff(self, attempt, requested=None):
+        # Full jitter, but never sooner than the server asked for
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+        return max(delay, requested or 0.0)
+
+    def execute(self, request, write=False, name="request"):
+        # Latency is recorded per logical request, including rate-limit waits and retries
+        with METRICS.timer(f"api.{name}"):
+            return self._execute(request, write, name)
+
+    def _execute(self, request, write, name=None):
+        bucket = self.write_bucket if write else self.read_bucket
+        attempt = 0
+        while True:
+            bucket.acquire()
+            try:
+                if self.http_factory is not None:
+                    return request.execute(http=self._http())
+                return request.execute()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, bucket, name)
+                if delay is None:
+                    raise
+                attempt += 1
+                self.sleep(delay)
+
+    def _retry_delay(self, error, attempt, bucket, name):
+        # Seconds to wait before retrying a failed attempt, or None to give up
+        if attempt >= self.max_retries or not is_retryable(error, name):
+            return None
+        requested = retry_after(error)
+        delay = self.backoff(attempt, requested)
+        if requested is not None or error_status(error) == 429:
+            bucket.pause(delay)
+        self.retries += 1
+        METRICS.observe("api.retry_wait", delay)
+        return delay
+
+    async def execute_async(self, make_coro, write=False, name="request"):
+        # execute() for a coroutine request on the transport's event loop: same buckets,
+        # quota and backoff, but waits are awaited so the loop keeps other requests going.
+        # make_coro is called again for every attempt.
+        with METRICS.timer(f"api.{name}"):
+            bucket = self.write_bucket if write else self.read_bucket
+            attempt = 0
+            while True:
+                wait = bucket.reserve()
+                if wait:
+                    await asyncio.sleep(wait)
+                try:
+                    return await make_coro()
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt, bucket, name)
+                    if delay is None:
+                        raise
+                    attempt += 1
+                    await asyncio.sleep(delay)
+
+    @property
+    def loop(self):
+        # The asyncio transport's event loop, if that transport is in use
+        return getattr(self.transport, "loop", None)
+
+    def submit(self, fn, *args, **kwargs):
+        if inspect.iscoroutinefunction(fn):
+            # Runs on the transport's loop: in-flight requests are bounded by its
+            # connection pool, not by the number of worker threads
+            return asyncio.run_coroutine_threadsafe(fn(*args, **kwargs), self.loop)
+        return self.pool.submit(fn, *args, **kwargs)
+
+    def wrap(self, service):
+        # Service whose requests all go through this executor on .execute()
+        return _ServiceProxy(service, self)
+
+    def shutdown(self, wait=True):
+        self.pool.shutdown(wait=wait)
+        if self.transport is not None:
+            self.transport.close()
+
+
+class _ServiceProxy:
+    def __init__(self, target, executor):
+        self._target = target
+        self._executor = executor
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if hasattr(result, "execute"):
+                return _RequestProxy(result, self._executor, name)
+            return _ServiceProxy(result, self._executor)
+
+        return call
+
+
+class _RequestProxy:
+    def __init__(self, request, executor, name):
+        self._request = request
+        self._executor = executor
+        self._name = name
+
+    def execute(self):
+        return self._executor.execute(self._request, self._name in WRITE_METHODS, self._name)
+
+
+class CountingHttp:
+    # Delegates to an httplib2-style http object and counts the bytes on the wire
+
+    def __init__(self, http):
+        self.http = http
+
+    def __getattr__(self, name):
+        return getattr(self.http, name)
+
+    def request(self, uri, method="GET", body=None, headers=None, *args, **kwargs):
+        resp, content = self.http.request(uri, method, body, headers, *args, **kwargs)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        METRICS.add_bytes("http.sent", len(body or b""))
+        METRICS.add_bytes("http.received", len(content or b""))
+        return resp, content
+
+
+def authorized_http_factory(creds):
+    # One authorized httplib2 connection per worker thread
+    import httplib2
+    from google_auth_httplib2 import AuthorizedHttp
+
+    return lambda: CountingHttp(AuthorizedHttp(creds, http=httplib2.Http()))
+
+
+def people_service(creds, transport=PEOPLE_TRANSPORT, max_workers=API_CONCURRENCY):
+    # (executor, service): a People API service whose requests all go through the executor
+    if transport == "asyncio":
+        from async_people import AsyncPeopleClient
+
+        executor = ApiExecutor(max_workers=max_workers)
+        executor.transport = AsyncPeopleClient(creds)
+        return executor, executor.wrap(executor.transport.service())
+    if transport != "httplib2":
+        raise ValueError(f"Unknown transport {transport!r}; expected one of {TRANSPORTS}")
+    from googleapiclient.discovery import build
+
+    executor = ApiExecutor(max_workers=max_workers, http_factory=authorized_http_factory(creds))
+    return executor, executor.wrap(build("people", "v1", credentials=creds))
+
+
+def calendar_service(creds):
+    # (executor, service) for Calendar API v3. Its connections are authorized with these
+    # creds, which carry the calendar scope the People executor's may lack.
+    from googleapiclient.discovery import build
+
+    executor = ApiExecutor(max_workers=1, http_factory=authorized_http_factory(creds))
+    return executor, executor.wrap(build("calendar", "v3", credentials=creds))
@@ -0,0 +1,432 @@
+# Optional asyncio transport for the People API endpoints this tool uses. One event loop
+# thread owns a bounded pool of keep-alive HTTP/1.1 connections shared by every caller;
+# service() returns a blocking facade shaped like googleapiclient's resource, so
+# people_api, ContactsCache and ApiExecutor (rate limits, retries) work unchanged.
+# Bulk work uses the coroutines at the bottom instead: submitted to the executor they run
+# on the loop, so a chunk waiting on the network does not hold a thread.
+#
+# Select it with BIRTHDAY_SYNC_TRANSPORT=asyncio (desktop) or --transport asyncio.
+import asyncio
+import gzip
+import json
+import ssl
+import threading
+from urllib.parse import quote, urlencode, urlsplit
+
+from api_executor import WRITE_METHODS
+from metrics import METRICS
+from people_api import (
+    BATCH_SIZE,
+    batch_create_body,
+    batch_create_results,
+    batch_get_results,
+    batch_update_body,
+    batch_update_results,
+    birthday_body,
+    contact_body,
+    is_batch_rejection,
+    is_etag_mismatch,
+)
+
+PEOPLE_API_URL = "https://people.googleapis.com"
+ASYNC_MAX_CONNECTIONS = 10  # Keep-alive connections, and so requests in flight
+ASYNC_TIMEOUT = 60  # seconds per request
+
+
+def _http_error(status, headers, content):
+    # Raise what googleapiclient would so is_retryable / is_etag_mismatch / sync-token
+    # handling see the same error type on either transport
+    import httplib2
+    from googleapiclient.errors import HttpError
+
+    return HttpError(httplib2.Response({**headers, "status": str(status)}), content)
+
+
+def _query(params):
+    # Booleans as the API expects them; None values dropped; lists repeated
+    clean = {}
+    for key, value in params.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            value = "true" if value else "false"
+        clean[key] = value
+    return urlencode(clean, doseq=True)
+
+
+class _NoResponse(ConnectionResetError):
+    # The connection failed before any byte of the response arrived
+    pass
+
+
+class _Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self):
+        self.writer.close()
+
+
+class AsyncPeopleClient:
+    def __init__(
+        self,
+        creds=None,
+        base_url=PEOPLE_API_URL,
+        max_connections=ASYNC_MAX_CONNECTIONS,
+        timeout=ASYNC_TIMEOUT,
+    ):
+        url = urlsplit(base_url)
+        self.creds = creds
+        self.host = url.hostname
+        self.port = url.port or (443 if url.scheme == "https" else 80)
+        self.ssl = ssl.create_default_context() if url.scheme == "https" else None
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._idle = []
+        self._slots = None
+        self._auth_lock = None
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+
+    # Event loop plumbing
+
+    def run(self, coro):
+        # Run a coroutine on the client's loop from any other thread and wait for it
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def close(self):
+        async def drain():
+            while self._idle:
+                self._idle.pop().close()
+
+        if self.loop.is_running():
+            self.run(drain())
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+
+    def service(self):
+        return _SyncService(self)
+
+    # HTTP
+
+    async def _acquire(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_connections)
+        await self._slots.acquire()
+        while self._idle:
+            conn = self._idle.pop()
+            if not conn.writer.is_closing():
+                return conn, True
+        reader, writer = await asyncio.open_connection(
+            self.host, self.port, ssl=self.ssl, server_hostname=self.host if self.ssl else None
+        )
+        return _Connection(reader, writer), False
+
+    def _release(self, conn, reusable):
+        if reusable:
+            self._idle.append(conn)
+        else:
+            conn.close()
+        self._slots.release()
+
+    async def _auth_header(self):
+        if self.creds is None:
+            return {}
+        if self._auth_lock is None:
+            self._auth_lock = asyncio.Lock()
+        async with self._auth_lock:
+            if not self.creds.valid:
+                from people_api import refresh_credentials
+
+                if not await asyncio.to_thread(refresh_credentials, self.creds):
+                    raise RuntimeError("Google sign-in expired; sign in again with the desktop app")
+        return {"Authorization": f"Bearer {self.creds.token}"}
+
+    async def _exchange(self, conn, method, target, headers, payload):
+        head = [f"{method} {target} HTTP/1.1"] + [f"{k}: {v}" for k, v in headers.items()]
+        try:
+            conn.writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload)
+            await conn.writer.drain()
+            status_line = await conn.reader.readline()
+        except ConnectionError as e:
+            raise _NoResponse(str(e)) from e
+        if not status_line:
+            raise _NoResponse("Connection closed before the response")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = (await conn.reader.readline()).decode("latin-1").rstrip("\r\n")
+            if not line:
+                break
+            key, _, value = line.partition(":")
+            response_headers[key.strip().lower()] = value.strip()
+
+        reusable = response_headers.get("connection", "").lower() != "close"
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            parts = []
+            while True:
+                size = int((await conn.reader.readline()).split(b";")[0], 16)
+                if not size:
+                    await conn.reader.readline()
+                    break
+                parts.append(await conn.reader.readexactly(size))
+                await conn.reader.readline()
+            content = b"".join(parts)
+        elif "content-length" in response_headers:
+            content = await conn.reader.readexactly(int(response_headers["content-length"]))
+        else:
+            content = await conn.reader.read()
+            reusable = False
+        METRICS.add_bytes("http.sent", len(payload))
+        METRICS.add_bytes("http.received", len(content))
+        if response_headers.get("content-encoding") == "gzip":
+            content = gzip.decompress(content)
+        return status, response_headers, content, reusable
+
+    async def request(self, method, path, params=None, body=None, resend=True):
+        # One JSON request; raises HttpError for 4xx/5xx like googleapiclient. With resend,
+        # a reused keep-alive connection the server closed before answering is replaced
+        # and the request sent again. Creates pass resend=False: the server may still
+        # have acted on a request it did not answer, and ApiExecutor decides about those.
+        target = path + (f"?{_query(params)}" if params else "")
+        payload = json.dumps(body).encode("utf-8") if body is not None else b""
+        headers = {
+            "Host": self.host,
+            "User-Agent": "birthday-sync-asyncio",
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip",
+            "Content-Length": str(len(payload)),
+            **(await self._auth_header()),
+        }
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        while True:
+            conn, reused = await self._acquire()
+            reusable = False
+            try:
+                status, response_headers, content, reusable = await asyncio.wait_for(
+                    self._exchange(conn, method, target, headers, payload), self.timeout
+                )
+            except _NoResponse:
+                if reused and resend:
+                    # The server dropped an idle keep-alive connection: retry on a new one
+                    continue
+                raise
+            finally:
+                self._release(conn, reusable)
+            break
+        if status >= 400:
+            raise _http_error(status, response_headers, content)
+        return json.loads(content) if content else {}
+
+    # People API endpoints (v1)
+
+    async def list_connections(self, resourceName="people/me", **params):
+        return await self.request("GET", f"/v1/{quote(resourceName)}/connections", params)
+
+    async def get(self, resourceName, **params):
+        return await self.request("GET", f"/v1/{quote(resourceName)}", params)
+
+    async def get_batch_get(self, **params):
+        return await self.request("GET", "/v1/people:batchGet", params)
+
+    async def create_contact(self, body, **params):
+        return await self.request("POST", "/v1/people:createContact", params, body, resend=False)
+
+    async def update_contact(self, resourceName, body, **params):
+        return await self.request("PATCH", f"/v1/{quote(resourceName)}:updateContact", params, body)
+
+    async def batch_create_contacts(self, body):
+        return await self.request(
+            "POST", "/v1/people:batchCreateContacts", None, body, resend=False
+        )
+
+    async def batch_update_contacts(self, body):
+        return await self.request("POST", "/v1/people:batchUpdateContacts", None, body)
+
+
+class _SyncRequest:
+    # Re-creates the coroutine on every execute() so ApiExecutor can retry it
+    def __init__(self, client, make_coro):
+        self.client = client
+        self.make_coro = make_coro
+
+    def execute(self, http=None):
+        return self.client.run(self.make_coro())
+
+
+class _SyncService:
+    def __init__(self, client):
+        self.client = client
+
+    def people(self):
+        return _SyncPeople(self.client)
+
+
+class _SyncPeople:
+    def __init__(self, client):
+        self.client = client
+
+    def _request(self, fn, **kwargs):
+        return _SyncRequest(self.client, lambda: fn(**kwargs))
+
+    def connections(self):
+        return _SyncConnections(self.client)
+
+    def get(self, **kwargs):
+        return self._request(self.client.get, **kwargs)
+
+    def getBatchGet(self, **kwargs):
+        return self._request(self.client.get_batch_get, **kwargs)
+
+    def createContact(self, **kwargs):
+        return self._request(self.client.create_contact, **kwargs)
+
+    def updateContact(self, **kwargs):
+        return self._request(self.client.update_contact, **kwargs)
+
+    def batchCreateContacts(self, **kwargs):
+        return self._request(self.client.batch_create_contacts, **kwargs)
+
+    def batchUpdateContacts(self, **kwargs):
+        return self._request(self.client.batch_update_contacts, **kwargs)
+
+
+class _SyncConnections:
+    def __init__(self, client):
+        self.client = client
+
+    def list(self, **kwargs):
+        return _SyncRequest(self.client, lambda: self.client.list_connections(**kwargs))
+
+
+# Coroutine versions of people_api's bulk helpers, same results and fallbacks. `executor`
+# is the ApiExecutor whose transport is an AsyncPeopleClient; every request goes through
+# its rate limits and retries.
+
+
+def _call(executor, name, fn, *args, **kwargs):
+    return executor.execute_async(lambda: fn(*args, **kwargs), name in WRITE_METHODS, name)
+
+
+async def refresh(executor, store, resource_names, max_age=None):
+    # ContactStore.refresh with the getBatchGet requests in flight together
+    client = executor.transport
+    stale = store.stale(resource_names, max_age)
+    responses = await asyncio.gather(
+        *(
+            _call(
+                executor,
+                "getBatchGet",
+                client.get_batch_get,
+                resourceNames=stale[start : start + BATCH_SIZE],
+                personFields="names,birthdays,metadata",
+            )
+            for start in range(0, len(stale), BATCH_SIZE)
+        )
+    )
+    for response in responses:
+        for person in batch_get_results(response).values():
+            store.put(person)
+    return len(stale)
+
+
+async def create_contacts(executor, items):
+    # people_api.create_contacts
+    client = executor.transport
+    try:
+        response = await _call(
+            executor, "batchCreateContacts", client.batch_create_contacts, batch_create_body(items)
+        )
+    except Exception as e:
+        if not is_batch_rejection(e):
+            return [(None, e)] * len(items)
+        return await asyncio.gather(*(_create_one(executor, name, b) for name, b in items))
+    return batch_create_results(response, items)
+
+
+async def _create_one(executor, name, birthday_str):
+    try:
+        client = executor.transport
+        body = contact_body(name, birthday_str)
+        return await _call(executor, "createContact", client.create_contact, body), None
+    except Exception as e:
+        return None, e
+
+
+async def _update_one(executor, store, resource_name, birthday_str, refetch=False):
+    # ContactStore.update_birthday, errors returned rather than raised
+    client = executor.transport
+
+    async def refetch_contact():
+        person = await _call(
+            executor,
+            "get",
+            client.get,
+            resourceName=resource_name,
+            personFields="names,birthdays,metadata",
+        )
+        return store.put(person)
+
+    async def update(contact):
+        person = await _call(
+            executor,
+            "updateContact",
+            client.update_contact,
+            contact["resourceName"],
+            birthday_body(contact, birthday_str),
+            updatePersonFields="birthdays",
+        )
+        return store.put(person)
+
+    try:
+        contact = store.get(resource_name)
+        if contact is None or refetch:
+            contact = await refetch_contact()
+        try:
+            return await update(contact), None
+        except Exception as e:
+            if refetch or not is_etag_mismatch(e):
+                raise
+            return await update(await refetch_contact()), None
+    except Exception as e:
+        return None, e
+
+
+async def _batch_update(executor, store, items):
+    client = executor.transport
+    contacts = store.with_etags(items)
+    response = await _call(
+        executor, "batchUpdateContacts", client.batch_update_contacts, batch_update_body(contacts)
+    )
+    return batch_update_results(response, contacts)
+
+
+async def update_birthdays(executor, store, items):
+    # ContactStore.update_birthdays
+    try:
+        results = await _batch_update(executor, store, items)
+    except Exception as e:
+        if not is_batch_rejection(e):
+            return [(None, e)] * len(items)
+        return await asyncio.gather(*(_update_one(executor, store, rn, b) for rn, b in items))
+    rows, stale = store.apply_batch(results)
+    if stale:
+        retry = [items[i] for i in stale]
+        try:
+            await refresh(executor, store, [rn for rn, _ in retry], max_age=0)
+            retried = await _batch_update(executor, store, retry)
+        except Exception as e:
+            if is_batch_rejection(e):
+                retried = await asyncio.gather(
+                    *(_update_one(executor, store, rn, b, refetch=True) for rn, b in retry)
+                )
+            else:
+                retried = [(None, e)] * len(retry)
+        else:
+            retried = [(store.put(p), None) if e is None else (None, e) for p, e in retried]
+        for i, result in zip(stale, retried):
+            rows[i] = result
+    return rows
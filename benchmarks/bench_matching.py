@@ -0,0 +1,74 @@
+# Compare per-row process.extract matching, the batched cdist engine and the
+# n-gram blocking index.
+# Run from the repository root: python -m benchmarks.bench_matching --titles 3000 --contacts 20000
+import argparse
+import time
+
+from benchmarks.synthetic import calendar_titles, contact_names
+from matching import MATCH_THRESHOLD, MIN_OVERLAP, MatchEngine, match_names
+
+
+def agreement(expected, actual):
+    return sum(match_names(expected[t]) == match_names(actual[t]) for t in expected)
+
+
+def score_agreement(expected, actual):
+    # Dropdowns offering the same scores above the threshold; ties may pick other names
+    def shown(scored):
+        return [score for _, score in scored if score > MATCH_THRESHOLD]
+
+    return sum(shown(expected[t]) == shown(actual[t]) for t in expected)
+
+
+def best_agreement(expected, actual):
+    return sum(match_names(expected[t])[0] == match_names(actual[t])[0] for t in expected)
+
+
+def run(n_titles, n_contacts, min_overlap, max_candidates):
+    names = contact_names(n_contacts)
+    titles = calendar_titles(names, n_titles)
+    engine = MatchEngine(names, blocking=False)
+    blocked_engine = MatchEngine(
+        names, blocking=True, min_overlap=min_overlap, max_candidates=max_candidates
+    )
+
+    start = time.perf_counter()
+    per_row = {title: engine.match(title) for title in titles}
+    per_row_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = engine.match_all(titles)
+    batched_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    blocked = blocked_engine.match_all(titles)
+    blocked_seconds = time.perf_counter() - start
+    scored = sum(len(blocked_engine.index.candidates(t)) for t in per_row) / len(per_row)
+
+    print(f"titles={n_titles} contacts={n_contacts} unique titles={len(per_row)}")
+    print(f"  per-row extract : {per_row_seconds:8.3f}s")
+    print(
+        f"  batched cdist   : {batched_seconds:8.3f}s ({per_row_seconds / batched_seconds:.1f}x)"
+        f", dropdowns identical: {agreement(per_row, batched)}/{len(per_row)}"
+    )
+    print(
+        f"  blocking index  : {blocked_seconds:8.3f}s ({per_row_seconds / blocked_seconds:.1f}x)"
+        f", dropdowns identical: {agreement(per_row, blocked)}/{len(per_row)}"
+        f", same scores: {score_agreement(per_row, blocked)}/{len(per_row)}"
+        f", best match identical: {best_agreement(per_row, blocked)}/{len(per_row)}"
+        f", names scored per title: {scored:.0f} ({100 * scored / n_contacts:.2f}%)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--titles", type=int, default=3000)
+    parser.add_argument("--contacts", type=int, default=20000)
+    parser.add_argument("--min-overlap", type=float, default=MIN_OVERLAP)
+    parser.add_argument("--max-candidates", type=int, default=None)
+    args = parser.parse_args()
+    run(args.titles, args.contacts, args.min_overlap, args.max_candidates)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+# End-to-end timings against the in-process fake People service: startup, matching,
+# .ics and Google Calendar imports and bulk update/create runs. Results are written as
+# JSON tagged with the current commit so runs can be compared across changes.
+# Run from the repository root:
+#   python -m benchmarks.bench_sync --contacts 20000 --events 10000 --latency-ms 50
+#   python -m benchmarks.bench_sync --compare benchmarks/results/<earlier run>.json
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from api_executor import API_CONCURRENCY, TRANSPORTS, ApiExecutor
+from async_people import AsyncPeopleClient
+from benchmarks.fake_calendar import FakeCalendarService
+from benchmarks.fake_people import FakePeopleService
+from benchmarks.fake_server import FakePeopleServer
+from benchmarks.synthetic import calendar_rows, calendar_titles, contact_names, people, write_ics
+from calendar_source import CalendarCache, import_calendar
+from contacts_cache import ContactsCache
+from headless_sync import apply_plan, plan_rows
+from ics_import import find_new_events
+from matching import MatchEngine, match_names
+from metrics import METRICS
+from people_api import ContactStore
+from state_store import JournalStateStore, add_rows, write_csv
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def git_commit():
+    try:
+        sha = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(
+            subprocess.run(
+                ["git", "status", "--porcelain", "--untracked-files=no"],
+                capture_output=True,
+                text=True,
+            ).stdout.strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+    return sha, dirty
+
+
+@contextmanager
+def timed(timings, name):
+    start = time.perf_counter()
+    yield
+    timings[name] = round(time.perf_counter() - start, 4)
+
+
+def time_module_import(module):
+    # Cold import in a fresh interpreter; None if the module cannot be imported here
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", f"import {module}"], capture_output=True)
+    if proc.returncode != 0:
+        return None
+    return round(time.perf_counter() - start, 4)
+
+
+def time_populate_entries(df, contacts, service, state, executor):
+    # Needs a display; returns None when Tk cannot open a window
+    try:
+        import tkinter
+
+        from google_birthday_sync import CalendarSyncApp
+    except ImportError:
+        return None
+    try:
+        app = CalendarSyncApp(df, contacts, service, state, executor)
+    except tkinter.TclError:
+        return None
+    app.withdraw()
+    start = time.perf_counter()
+    app.populate_entries()
+    app.update_idletasks()
+    seconds = round(time.perf_counter() - start, 4)
+    app.destroy()
+    return seconds
+
+
+def time_calendar_import(rows, state, df, cache_path, timings, changes=10):
+    # A full import through the fake Calendar API, then a delta after `changes` events
+    # were added, moved and deleted. The events are the rows already in df, so the full
+    # import adds nothing; the delta is a dry run. Later steps see the same df either way.
+    calendar = FakeCalendarService((row["Title"], row["Start"]) for row in rows)
+    cache = CalendarCache(cache_path)
+    with timed(timings, "calendar_full_import"):
+        df, _, _ = import_calendar(calendar, state, df, cache)
+    full_bytes = calendar.bytes_sent
+    event_ids = list(calendar.events_by_id)
+    for i in range(changes):
+        calendar.add_event(f"Benchmark Person {i}", "1990-01-01")
+    for event_id in event_ids[:changes]:
+        calendar.update_event(event_id, date="1990-01-02")
+    for event_id in event_ids[changes : 2 * changes]:
+        calendar.delete_event(event_id)
+    with timed(timings, "calendar_delta_import"):
+        import_calendar(calendar, state, df, cache, dry_run=True)
+    cache.close()
+    return df, {
+        "full_bytes": full_bytes,
+        "delta_bytes": calendar.bytes_sent - full_bytes,
+        "api_calls": dict(calendar.calls),
+    }
+
+
+def run(args):
+    names = contact_names(args.contacts)
+    titles = calendar_titles(names, args.events)
+    rows = calendar_rows(titles)
+    timings = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "calendar.csv")
+        ics_path = os.path.join(tmp, "calendar.ics")
+        # Half the events are already known; the .ics carries all of them
+        write_csv(add_rows(pd.DataFrame(), rows[: len(rows) // 2]), csv_path)
+        write_ics(ics_path, rows)
+
+        fake = FakePeopleService(
+            people(names),
+            latency=args.latency_ms / 1000,
+            quota_per_minute=args.quota,
+            error_rate=args.error_rate,
+        )
+        rate = args.quota or 10**9
+        executor = ApiExecutor(
+            max_workers=args.concurrency, read_per_minute=rate, write_per_minute=rate
+        )
+        server = None
+        if args.transport == "asyncio":
+            # Real sockets: the fake served over localhost HTTP/1.1
+            server = FakePeopleServer(fake)
+            executor.transport = AsyncPeopleClient(
+                base_url=server.url, max_connections=args.concurrency
+            )
+            service = executor.wrap(executor.transport.service())
+        else:
+            service = executor.wrap(fake)
+
+        timings["import_gui_module"] = time_module_import("google_birthday_sync")
+        state = JournalStateStore(csv_path)
+        with timed(timings, "load_state"):
+            df = state.load()
+        cache = ContactsCache(os.path.join(tmp, "contacts.sqlite3"))
+        with timed(timings, "contacts_full_fetch"):
+            contacts = cache.refresh(service)
+        with timed(timings, "contacts_delta_fetch"):
+            cache.refresh(service)
+
+        with timed(timings, "ics_import"):
+            new_rows = find_new_events(ics_path, set(zip(df["Title"], df["Start"])))
+            df = state.append_rows(df, new_rows)
+        df, calendar_counters = time_calendar_import(
+            rows, state, df, os.path.join(tmp, "calendar.sqlite3"), timings
+        )
+
+        store = ContactStore()
+        pending_titles = df.loc[~(df["done"] | df["removed"]), "Title"].tolist()
+        with timed(timings, "match_all"):
+            engine = MatchEngine(store.add(contacts))
+            scores = engine.match_all(pending_titles)
+            for title in pending_titles:
+                for name in match_names(scores[title]):
+                    store.resources(name)
+        timings["populate_entries"] = time_populate_entries(df, contacts, service, state, executor)
+
+        with timed(timings, "plan"):
+            updates, creates, review, noops = plan_rows(df, store, create_unmatched=True)
+        # Rows left for review stand in for the ones a user would create by hand
+        creates += review
+        with timed(timings, "bulk_update"):
+            updated, update_errors = apply_plan(service, state, df, store, updates, [], executor)
+        with timed(timings, "bulk_create"):
+            created, create_errors = apply_plan(service, state, df, store, [], creates, executor)
+        executor.shutdown()
+        if server is not None:
+            server.close()
+        state.close()
+        cache.close()
+
+    sha, dirty = git_commit()
+    return {
+        "commit": sha,
+        "dirty": dirty,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "params": vars(args),
+        "timings": timings,
+        "counters": {
+            "contacts": len(contacts),
+            "events": len(df),
+            "imported": len(new_rows),
+            "updated": len(updated),
+            "created": len(created),
+            "review": len(review),
+            "no_ops": len(noops),
+            "errors": len(update_errors) + len(create_errors),
+            "api_calls": dict(fake.calls),
+            "calendar": calendar_counters,
+            "injected_errors": {str(k): v for k, v in fake.errors.items()},
+            "retries": executor.retries,
+        },
+        # Per-operation breakdown from the built-in instrumentation
+        "metrics": METRICS.snapshot(),
+    }
+
+
+def compare(result, baseline):
+    print(f"{'timing':<22}{baseline.get('commit') or '?':>12}{result.get('commit') or '?':>12}")
+    for name, seconds in result["timings"].items():
+        before = baseline.get("timings", {}).get(name)
+        if seconds is None or before is None:
+            print(f"{name:<22}{before if before is not None else '-':>12}{seconds or '-':>12}")
+            continue
+        ratio = f"{before / seconds:.2f}x" if seconds else ""
+        print(f"{name:<22}{before:>12.3f}{seconds:>12.3f}  {ratio}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--contacts", type=int, default=20000)
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="per request")
+    parser.add_argument("--quota", type=int, default=None, help="requests per minute")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 503 responses")
+    parser.add_argument("--concurrency", type=int, default=API_CONCURRENCY)
+    parser.add_argument(
+        "--transport",
+        choices=TRANSPORTS,
+        default="httplib2",
+        help="httplib2 calls the fake in-process; asyncio goes through a localhost server",
+    )
+    parser.add_argument("--out", default=None, help="result file (default: benchmarks/results/)")
+    parser.add_argument("--compare", default=None, help="earlier result file to compare with")
+    args = parser.parse_args()
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    params = {k: v for k, v in vars(args).items() if k not in ("out", "compare")}
+    result = run(argparse.Namespace(**params))
+
+    out = args.out
+    if out is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        out = os.path.join(RESULTS_DIR, f"{stamp}-{result['commit'] or 'nogit'}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        f.write(json.dumps(result, indent=2) + "\n")
+    print(json.dumps(result["timings"], indent=2))
+    print(f"wrote {out}")
+    if baseline:
+        compare(result, baseline)
+
+
+if __name__ == "__main__":
+    main()
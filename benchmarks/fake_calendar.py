@@ -0,0 +1,95 @@
+# In-process stand-in for build("calendar", "v3") covering events().list with paging and
+# sync tokens, the way calendar_source uses it. Events are changed through add_event,
+# update_event and delete_event; a delta lists every event changed since the token,
+# deleted ones as status "cancelled". Unknown tokens get 410 Gone like the real API.
+import copy
+import json
+import threading
+from collections import Counter
+
+from benchmarks.fake_people import FakeRequest, http_error
+
+
+class FakeCalendarService:
+    def __init__(self, events=()):
+        self.lock = threading.Lock()
+        self.calls = Counter()
+        # Response bytes, to compare full and incremental imports
+        self.bytes_sent = 0
+        # eventId -> (version, event)
+        self.events_by_id = {}
+        self.version = 0
+        self.next_id = 0
+        for summary, date in events:
+            self.add_event(summary, date)
+
+    def call(self, method, fn):
+        with self.lock:
+            self.calls[method] += 1
+            response = fn()
+            self.bytes_sent += len(json.dumps(response))
+            return response
+
+    def _store(self, event):
+        self.version += 1
+        self.events_by_id[event["id"]] = (self.version, event)
+
+    def add_event(self, summary, date, yearly=True, all_day=True):
+        self.next_id += 1
+        event = {
+            "id": f"ev{self.next_id}",
+            "status": "confirmed",
+            "summary": summary,
+            "start": {"date": date} if all_day else {"dateTime": f"{date}T09:00:00Z"},
+            "description": "x" * 200,  # fields= should keep this off the wire
+        }
+        if yearly:
+            event["recurrence"] = ["RRULE:FREQ=YEARLY"]
+        self._store(event)
+        return event["id"]
+
+    def update_event(self, event_id, summary=None, date=None):
+        event = self.events_by_id[event_id][1]
+        if summary is not None:
+            event["summary"] = summary
+        if date is not None:
+            event["start"] = {"date": date}
+        self._store(event)
+
+    def delete_event(self, event_id):
+        event = self.events_by_id[event_id][1]
+        self._store({"id": event_id, "status": "cancelled"})
+        return event
+
+    def events(self):
+        return _Events(self)
+
+    def _list(
+        self, calendarId, maxResults=250, pageToken=None, syncToken=None, fields=None, **_
+    ):
+        if syncToken is not None and (not syncToken.isdigit() or int(syncToken) > self.version):
+            raise http_error(410, "Sync token is no longer valid, a full sync is required.")
+        since = int(syncToken) if syncToken else 0
+        changed = [e for v, e in self.events_by_id.values() if v > since]
+        if not syncToken:
+            changed = [e for e in changed if e.get("status") != "cancelled"]
+        start = int(pageToken or 0)
+        page = [copy.deepcopy(e) for e in changed[start : start + maxResults]]
+        if fields:
+            # Enough of the partial-response syntax for calendar_source's fields value
+            keep = fields.split("items(", 1)[1].rstrip(")").split(",")
+            page = [{k: e[k] for k in keep if k in e} for e in page]
+        response = {"items": page}
+        if start + maxResults < len(changed):
+            response["nextPageToken"] = str(start + maxResults)
+        else:
+            response["nextSyncToken"] = str(self.version)
+        return response
+
+
+class _Events:
+    def __init__(self, service):
+        self.service = service
+
+    def list(self, **kwargs):
+        return FakeRequest(self.service, "events.list", lambda: self.service._list(**kwargs))
@@ -0,0 +1,214 @@
+# In-process stand-in for build("people", "v1") with configurable latency, a
+# per-minute quota and random server errors. Implements the calls people_api makes:
+# connections().list, get, getBatchGet, createContact, updateContact, batchCreateContacts
+# and batchUpdateContacts. Errors are real HttpErrors so retry and etag handling run as
+# they would against Google.
+import copy
+import json
+import random
+import threading
+import time
+from collections import Counter, deque
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+
+def http_error(status, message, retry_after=None):
+    headers = {"status": str(status)}
+    if retry_after is not None:
+        headers["retry-after"] = str(retry_after)
+    content = json.dumps({"error": {"code": status, "message": message}}).encode()
+    return HttpError(httplib2.Response(headers), content)
+
+
+class FakeRequest:
+    def __init__(self, service, method, fn):
+        self.service = service
+        self.method = method
+        self.fn = fn
+
+    def execute(self, http=None):
+        return self.service.call(self.method, self.fn)
+
+
+class FakePeopleService:
+    def __init__(
+        self,
+        people=(),
+        latency=0.0,
+        quota_per_minute=None,
+        error_rate=0.0,
+        seed=0,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.latency = latency
+        self.quota_per_minute = quota_per_minute
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.clock = clock
+        self.sleep = sleep
+        self.lock = threading.Lock()
+        self.calls = Counter()
+        self.errors = Counter()
+        self.window = deque()
+        # resourceName -> (version, person); the version backs sync tokens
+        self.people_by_resource = {}
+        self.version = 0
+        self.next_id = 0
+        for person in people:
+            self._store(copy.deepcopy(person))
+
+    def _store(self, person):
+        self.version += 1
+        self.people_by_resource[person["resourceName"]] = (self.version, person)
+
+    def _new_person(self, body):
+        self.next_id += 1
+        person = {
+            "resourceName": f"people/fake{self.next_id}",
+            "names": copy.deepcopy(body.get("names", [])),
+            "birthdays": copy.deepcopy(body.get("birthdays", [])),
+        }
+        self._set_etag(person)
+        self._store(person)
+        return person
+
+    def _set_etag(self, person):
+        etag = f"etag-{self.version + 1}"
+        person["etag"] = etag
+        person["metadata"] = {"sources": [{"type": "CONTACT", "etag": etag}]}
+
+    def call(self, method, fn):
+        if self.latency:
+            self.sleep(self.latency)
+        with self.lock:
+            self.calls[method] += 1
+            if self.quota_per_minute:
+                now = self.clock()
+                while self.window and now - self.window[0] >= 60:
+                    self.window.popleft()
+                if len(self.window) >= self.quota_per_minute:
+                    self.errors[429] += 1
+                    wait = max(0.0, 60 - (now - self.window[0]))
+                    raise http_error(429, "Quota exceeded", retry_after=round(wait, 3))
+                self.window.append(now)
+            if self.error_rate and self.rng.random() < self.error_rate:
+                self.errors[503] += 1
+                raise http_error(503, "Service unavailable")
+            return fn()
+
+    def people(self):
+        return _People(self)
+
+    # Request implementations; called with the lock held
+
+    def _list(self, pageSize=100, pageToken=None, syncToken=None, requestSyncToken=False, **_):
+        since = int(syncToken) if syncToken else 0
+        changed = [p for v, p in self.people_by_resource.values() if v > since]
+        start = int(pageToken or 0)
+        page = changed[start : start + pageSize]
+        response = {"connections": copy.deepcopy(page), "totalItems": len(changed)}
+        if start + pageSize < len(changed):
+            response["nextPageToken"] = str(start + pageSize)
+        elif requestSyncToken:
+            response["nextSyncToken"] = str(self.version)
+        return response
+
+    def _get(self, resourceName, **_):
+        if resourceName not in self.people_by_resource:
+            raise http_error(404, "Requested entity was not found.")
+        return copy.deepcopy(self.people_by_resource[resourceName][1])
+
+    def _batch_get(self, resourceNames, **_):
+        responses = []
+        for resource_name in resourceNames:
+            response = {"requestedResourceName": resource_name}
+            if resource_name in self.people_by_resource:
+                response["person"] = copy.deepcopy(self.people_by_resource[resource_name][1])
+                response["httpStatusCode"] = 200
+            else:
+                response["httpStatusCode"] = 404
+                response["status"] = {"code": 5, "message": "Requested entity was not found."}
+            responses.append(response)
+        return {"responses": responses}
+
+    def _update(self, resource_name, body):
+        # (person, None) or (None, (status, message))
+        if resource_name not in self.people_by_resource:
+            return None, (404, "Requested entity was not found.")
+        person = self.people_by_resource[resource_name][1]
+        if body.get("etag") != person.get("etag"):
+            return None, (400, "Request person.etag is different than the current person.etag.")
+        person["birthdays"] = copy.deepcopy(body.get("birthdays", []))
+        self._set_etag(person)
+        self._store(person)
+        return copy.deepcopy(person), None
+
+    def _update_contact(self, resourceName, body, **_):
+        person, error = self._update(resourceName, body)
+        if error:
+            raise http_error(*error)
+        return person
+
+    def _create_contact(self, body, **_):
+        return copy.deepcopy(self._new_person(body))
+
+    def _batch_update(self, body):
+        results = {}
+        for resource_name, person_body in body["contacts"].items():
+            person, error = self._update(resource_name, person_body)
+            if error:
+                status, message = error
+                results[resource_name] = {
+                    "httpStatusCode": status,
+                    "status": {"code": 9, "message": message},
+                }
+            else:
+                results[resource_name] = {"person": person, "httpStatusCode": 200}
+        return {"updateResult": results}
+
+    def _batch_create(self, body):
+        created = [
+            {"person": copy.deepcopy(self._new_person(c["contactPerson"])), "httpStatusCode": 200}
+            for c in body["contacts"]
+        ]
+        return {"createdPeople": created}
+
+
+class _People:
+    def __init__(self, service):
+        self.service = service
+
+    def _request(self, method, fn, *args, **kwargs):
+        return FakeRequest(self.service, method, lambda: fn(*args, **kwargs))
+
+    def connections(self):
+        return _Connections(self.service)
+
+    def get(self, **kwargs):
+        return self._request("get", self.service._get, **kwargs)
+
+    def getBatchGet(self, **kwargs):
+        return self._request("getBatchGet", self.service._batch_get, **kwargs)
+
+    def updateContact(self, **kwargs):
+        return self._request("updateContact", self.service._update_contact, **kwargs)
+
+    def createContact(self, **kwargs):
+        return self._request("createContact", self.service._create_contact, **kwargs)
+
+    def batchUpdateContacts(self, body):
+        return self._request("batchUpdateContacts", self.service._batch_update, body)
+
+    def batchCreateContacts(self, body):
+        return self._request("batchCreateContacts", self.service._batch_create, body)
+
+
+class _Connections:
+    def __init__(self, service):
+        self.service = service
+
+    def list(self, **kwargs):
+        return FakeRequest(self.service, "connections.list", lambda: self.service._list(**kwargs))
@@ -0,0 +1,118 @@
+# Serves a FakePeopleService over localhost HTTP/1.1 (keep-alive) at the People API's
+# REST paths, so the asyncio transport can be exercised without Google.
+#
+#   server = FakePeopleServer(FakePeopleService(people(names)))
+#   client = AsyncPeopleClient(base_url=server.url)
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from googleapiclient.errors import HttpError
+
+
+def _params(query):
+    params = {}
+    for key, values in parse_qs(query).items():
+        if key == "resourceNames":
+            params[key] = values
+        elif key == "pageSize":
+            params[key] = int(values[0])
+        elif key == "requestSyncToken":
+            params[key] = values[0] == "true"
+        else:
+            params[key] = values[0]
+    return params
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep connections open between requests
+
+    def log_message(self, format, *args):
+        pass
+
+    def _route(self, method):
+        fake = self.server.fake
+        url = urlsplit(self.path)
+        path = unquote(url.path)
+        params = _params(url.query)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        if method == "GET" and path == "/v1/people/me/connections":
+            return "connections.list", lambda: fake._list(**params)
+        if method == "GET" and path == "/v1/people:batchGet":
+            return "getBatchGet", lambda: fake._batch_get(**params)
+        if method == "GET" and path.startswith("/v1/people/"):
+            return "get", lambda: fake._get(path[len("/v1/") :], **params)
+        if method == "POST" and path == "/v1/people:createContact":
+            return "createContact", lambda: fake._create_contact(body)
+        if method == "PATCH" and path.endswith(":updateContact"):
+            resource_name = path[len("/v1/") : -len(":updateContact")]
+            return "updateContact", lambda: fake._update_contact(resource_name, body)
+        if method == "POST" and path == "/v1/people:batchCreateContacts":
+            return "batchCreateContacts", lambda: fake._batch_create(body)
+        if method == "POST" and path == "/v1/people:batchUpdateContacts":
+            return "batchUpdateContacts", lambda: fake._batch_update(body)
+        return None, None
+
+    def _handle(self, method):
+        self.server.requests += 1
+        name, fn = self._route(method)
+        headers = {}
+        if fn is None:
+            status, content = 404, b'{"error": {"code": 404, "message": "Not found"}}'
+        else:
+            try:
+                status, content = 200, json.dumps(self.server.fake.call(name, fn)).encode()
+            except HttpError as e:
+                status, content = e.resp.status, e.content
+                if e.resp.get("retry-after"):
+                    headers["Retry-After"] = e.resp["retry-after"]
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+
+class FakePeopleServer:
+    def __init__(self, fake, host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.fake = fake
+        self.httpd.requests = 0
+        # TCP connections accepted, to check keep-alive reuse
+        self.connections = 0
+        handle = self.httpd.process_request
+
+        def counting(request, client_address):
+            self.connections += 1
+            handle(request, client_address)
+
+        self.httpd.process_request = counting
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,76 @@
+import random
+
+FIRST = [
+    "Ana", "Bruno", "Carla", "Diego", "Elena", "Fabio", "Gabriela", "Hugo", "Ines", "Joao",
+    "Karina", "Luis", "Marta", "Nuno", "Olivia", "Pedro", "Quentin", "Rita", "Sofia", "Tiago",
+    "Ursula", "Vasco", "Wanda", "Xavier", "Yara", "Zeca", "Maria", "José", "Lúcia", "André",
+]
+LAST = [
+    "Silva", "Santos", "Ferreira", "Pereira", "Oliveira", "Costa", "Rodrigues", "Martins",
+    "Jesus", "Sousa", "Fernandes", "Gonçalves", "Gomes", "Lopes", "Marques", "Alves",
+    "Almeida", "Ribeiro", "Pinto", "Carvalho", "Teixeira", "Moreira", "Correia", "Mendes",
+]
+SUFFIXES = ["", "", "", " Jr", " (work)", " Birthday", "'s birthday", " 🎂"]
+
+
+def contact_names(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(FIRST)} {rng.choice(LAST)} {rng.choice(LAST)}"
+        if rng.random() < 0.4
+        else f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+        for _ in range(n)
+    ]
+
+
+def calendar_titles(names, n, seed=1, unknown_ratio=0.3):
+    # Mostly noisy variants of known contacts, plus people not in the address book
+    rng = random.Random(seed)
+    titles = []
+    for _ in range(n):
+        if rng.random() < unknown_ratio:
+            titles.append(f"{rng.choice(FIRST)} {rng.choice(LAST)}{rng.choice(SUFFIXES)}")
+            continue
+        name = rng.choice(names)
+        if rng.random() < 0.3:
+            name = name.split(" ")[0] + " " + name.split(" ")[-1]
+        if rng.random() < 0.2:
+            name = name.lower()
+        titles.append(name + rng.choice(SUFFIXES))
+    return titles
+
+
+def people(names):
+    # People API person resources for `names`, as connections.list returns them
+    return [
+        {
+            "resourceName": f"people/c{i}",
+            "etag": f"etag-c{i}",
+            "names": [{"displayName": name}],
+            "metadata": {"sources": [{"type": "CONTACT", "etag": f"etag-c{i}"}]},
+        }
+        for i, name in enumerate(names)
+    ]
+
+
+def calendar_rows(titles, seed=2):
+    # [{"Title", "Start"}] with a birthday date per title
+    rng = random.Random(seed)
+    rows = []
+    for title in titles:
+        start = f"{rng.randint(1950, 2020)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        rows.append({"Title": title, "Start": start})
+    return rows
+
+
+def write_ics(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//benchmarks//synthetic//EN\r\n")
+        for i, row in enumerate(rows):
+            title = row["Title"].replace("\\", "\\\\").replace(",", "\\,").replace(";", "\\;")
+            f.write(
+                f"BEGIN:VEVENT\r\nUID:synthetic-{i}\r\n"
+                f"DTSTART;VALUE=DATE:{row['Start'].replace('-', '')}\r\n"
+                f"SUMMARY:{title}\r\nRRULE:FREQ=YEARLY\r\nEND:VEVENT\r\n"
+            )
+        f.write("END:VCALENDAR\r\n")
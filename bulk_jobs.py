@@ -0,0 +1,166 @@
+import json
+import os
+import threading
+import uuid
+
+from metrics import METRICS
+from people_api import BIRTHDAY_NOOP, birthday_change
+
+# Bulk creates/updates are persisted as jobs so a crash mid-run can be resumed. Each row is
+# checkpointed as it moves from pending (not sent yet) to in-flight (its request is out) to
+# committed (marked done in the state store) or failed (reported, left pending).
+PENDING = "pending"
+IN_FLIGHT = "in-flight"
+COMMITTED = "committed"
+FAILED = "failed"
+
+
+def job_log_path(csv_path):
+    return f"{csv_path}.jobs"
+
+
+class BulkJob:
+    # rows: [{"idx", "title", "date", "resourceName"}]; resourceName is None for creates
+
+    def __init__(self, job_id, rows):
+        self.id = job_id
+        self.rows = {row["idx"]: row for row in rows}
+        self.states = dict.fromkeys(self.rows, PENDING)
+
+    def with_state(self, *states):
+        return [self.rows[idx] for idx, state in self.states.items() if state in states]
+
+    @property
+    def finished(self):
+        return not self.with_state(PENDING, IN_FLIGHT)
+
+
+class JobLog:
+    # Append-only log of job starts and row transitions, fsynced per checkpoint like the
+    # state journal. load() replays it and rewrites it with the unfinished jobs only, so
+    # resuming costs time proportional to the work that is left.
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = None
+        self.jobs = {}
+
+    def load(self):
+        # Unfinished jobs from earlier runs, oldest first
+        jobs = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn final line from a crash mid-write
+                        continue
+                    if record.get("op") == "start":
+                        jobs[record["job"]] = BulkJob(record["job"], record["rows"])
+                    elif record.get("op") == "state" and record["job"] in jobs:
+                        job = jobs[record["job"]]
+                        for idx in record["idx"]:
+                            if idx in job.states:
+                                job.states[idx] = record["state"]
+                    elif record.get("op") == "end":
+                        jobs.pop(record["job"], None)
+        self.jobs = {job_id: job for job_id, job in jobs.items() if not job.finished}
+        self._compact()
+        return list(self.jobs.values())
+
+    def _compact(self):
+        records = []
+        for job in self.jobs.values():
+            records.append({"op": "start", "job": job.id, "rows": list(job.rows.values())})
+            for state in (IN_FLIGHT, COMMITTED, FAILED):
+                idx = [i for i, s in job.states.items() if s == state]
+                if idx:
+                    records.append({"op": "state", "job": job.id, "idx": idx, "state": state})
+        tmp_path = f"{self.path}.tmp"
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write("".join(json.dumps(r) + "\n" for r in records))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+    def _append(self, record):
+        text = json.dumps(record) + "\n"
+        with self.lock, METRICS.timer("jobs.append"):
+            if self.file is None:
+                self.file = open(self.path, "a", encoding="utf-8")
+            self.file.write(text)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def start(self, rows):
+        # Record a job before any of its requests are sent
+        rows = [
+            {
+                "idx": int(row["idx"]),
+                "title": row["title"],
+                "date": row["date"],
+                "resourceName": row.get("resourceName"),
+            }
+            for row in rows
+        ]
+        job = BulkJob(uuid.uuid4().hex, rows)
+        self._append({"op": "start", "job": job.id, "rows": rows})
+        self.jobs[job.id] = job
+        return job
+
+    def checkpoint(self, job, indices, state):
+        indices = [int(idx) for idx in indices]
+        if not indices:
+            return
+        self._append({"op": "state", "job": job.id, "idx": indices, "state": state})
+        for idx in indices:
+            job.states[idx] = state
+
+    def finish(self, job):
+        self._append({"op": "end", "job": job.id})
+        self.jobs.pop(job.id, None)
+
+    def reconcile(self, job, store, df):
+        # Split an interrupted job's unfinished rows into (landed, remaining). Rows already
+        # done or removed in df were settled after the last checkpoint. An in-flight row
+        # may have reached Google before the crash: it has landed if the contact it
+        # updated, or a contact named like the row it created, already has its birthday.
+        # Resending those would overwrite nothing but create duplicates.
+        settled = set(df.index[df["done"] | df["removed"]])
+        landed = []
+        remaining = []
+        committed = []
+        for state in (IN_FLIGHT, PENDING):
+            for row in job.with_state(state):
+                if row["idx"] not in df.index or row["idx"] in settled:
+                    committed.append(row["idx"])
+                elif state == IN_FLIGHT and self._has_landed(row, store):
+                    landed.append(row)
+                else:
+                    remaining.append(row)
+        self.checkpoint(job, committed, COMMITTED)
+        return landed, remaining
+
+    @staticmethod
+    def _has_landed(row, store):
+        if row["resourceName"]:
+            candidates = [row["resourceName"]]
+        else:
+            candidates = store.resources(row["title"])
+        return any(
+            birthday_change(store.get(rn), row["date"]) == BIRTHDAY_NOOP
+            for rn in candidates
+            if rn in store
+        )
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
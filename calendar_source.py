@@ -0,0 +1,206 @@
+import json
+import sqlite3
+
+from contacts_cache import is_expired_sync_token
+from metrics import METRICS, timed
+from state_store import add_rows, pending_mask
+
+CALENDAR_SCOPE = "https://www.googleapis.com/auth/calendar.readonly"
+CALENDAR_CACHE_PATH = "./calendar_cache.sqlite3"
+CALENDAR_ID = "primary"
+EVENTS_PAGE_SIZE = 2500  # Calendar API maximum for events.list
+# Only what a row needs; keeps a nightly delta to a few kilobytes
+EVENT_FIELDS = "nextPageToken,nextSyncToken,items(id,status,summary,start,recurrence)"
+SCHEMA_VERSION = "1"
+
+
+def is_yearly(event):
+    return any(
+        rule.startswith("RRULE:") and "FREQ=YEARLY" in rule.upper()
+        for rule in event.get("recurrence", [])
+    )
+
+
+def event_row(event):
+    # (Title, Start) as the .ics import produces them: the series' first date
+    start = event.get("start", {})
+    day = start.get("date") or (start.get("dateTime") or "")[:10]
+    if not day:
+        return None
+    return event.get("summary") or "", day
+
+
+@timed("calendar.list_events")
+def list_events(service, calendar_id=CALENDAR_ID, page_token=None, sync_token=None):
+    # Recurring series come back as one item each (singleEvents=False), so a yearly
+    # birthday is a single event however many years it spans. Deltas always include
+    # cancelled events, and syncToken rules out the other filters, which is why the
+    # yearly check happens client-side.
+    params = {
+        "calendarId": calendar_id,
+        "maxResults": EVENTS_PAGE_SIZE,
+        "singleEvents": False,
+        "fields": EVENT_FIELDS,
+    }
+    if page_token:
+        params["pageToken"] = page_token
+    if sync_token:
+        params["syncToken"] = sync_token
+    response = service.events().list(**params).execute()
+    METRICS.add_bytes("calendar.list_events", len(json.dumps(response)))
+    return response
+
+
+class CalendarCache:
+    # The yearly events last imported from one calendar, keyed by event id, plus the
+    # syncToken that fetches only what changed since. Mirrors ContactsCache.
+
+    def __init__(self, path=CALENDAR_CACHE_PATH, calendar_id=CALENDAR_ID):
+        self.path = path
+        self.calendar_id = calendar_id
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS events (
+                calendar_id TEXT,
+                event_id TEXT,
+                title TEXT,
+                start TEXT,
+                PRIMARY KEY (calendar_id, event_id)
+            );
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            """
+        )
+        if self.get_meta("schema_version") != SCHEMA_VERSION:
+            self.conn.execute("DELETE FROM events")
+            self.conn.execute("DELETE FROM meta")
+            self.set_meta("schema_version", SCHEMA_VERSION)
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        if value is None:
+            self.conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+        else:
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    @property
+    def _token_key(self):
+        return f"sync_token:{self.calendar_id}"
+
+    @property
+    def sync_token(self):
+        return self.get_meta(self._token_key)
+
+    def clear(self):
+        self.conn.execute("DELETE FROM events WHERE calendar_id = ?", (self.calendar_id,))
+        self.set_meta(self._token_key, None)
+
+    def _known(self, event_id):
+        row = self.conn.execute(
+            "SELECT title, start FROM events WHERE calendar_id = ? AND event_id = ?",
+            (self.calendar_id, event_id),
+        ).fetchone()
+        return tuple(row) if row else None
+
+    def _fetch(self, service, sync_token=None):
+        # (added, gone): rows to add and rows whose event was deleted, moved or renamed
+        added = []
+        gone = []
+        page_token = None
+        while True:
+            response = list_events(service, self.calendar_id, page_token, sync_token)
+            for event in response.get("items", []):
+                previous = self._known(event["id"])
+                row = None
+                if event.get("status") != "cancelled" and is_yearly(event):
+                    row = event_row(event)
+                if row == previous:
+                    continue
+                if previous is not None:
+                    gone.append(previous)
+                if row is None:
+                    self.conn.execute(
+                        "DELETE FROM events WHERE calendar_id = ? AND event_id = ?",
+                        (self.calendar_id, event["id"]),
+                    )
+                else:
+                    added.append(row)
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?)",
+                        (self.calendar_id, event["id"], *row),
+                    )
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+        self.set_meta(self._token_key, response.get("nextSyncToken"))
+        return added, gone
+
+    def changes(self, service):
+        # Incremental when a token is stored, a full listing otherwise (or when Google
+        # has expired the token). Nothing is committed until commit(): call it once the
+        # rows have been persisted, so a crash in between just refetches the same delta.
+        sync_token = self.sync_token
+        if sync_token:
+            try:
+                return self._fetch(service, sync_token)
+            except Exception as e:
+                self.conn.rollback()
+                if not is_expired_sync_token(e):
+                    raise
+        self.clear()
+        return self._fetch(service)
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+
+def merge_changes(state, df, added, gone):
+    # Returns (df, new_rows, removed_indices). New (Title, Start) pairs are appended as
+    # pending; pending rows whose event was deleted, moved or renamed are marked removed.
+    # Rows already done are left alone. With state None df is changed in memory only.
+    existing = set(zip(df["Title"], df["Start"]))
+    new_rows = []
+    for title, start in added:
+        if (title, start) not in existing:
+            existing.add((title, start))
+            new_rows.append({"Title": title, "Start": start})
+    removed = []
+    gone = set(gone) - set(added)
+    if gone:
+        titles = {title for title, _ in gone}
+        candidates = df[df["Title"].isin(titles) & pending_mask(df)]
+        keys = zip(candidates["Title"].tolist(), candidates["Start"].tolist())
+        removed = [idx for idx, key in zip(candidates.index.tolist(), keys) if key in gone]
+        if removed and state is not None:
+            state.mark(df, removed, "removed")
+        elif removed:
+            df.loc[removed, "removed"] = True
+    if new_rows:
+        df = state.append_rows(df, new_rows) if state is not None else add_rows(df, new_rows)
+    return df, new_rows, removed
+
+
+def import_calendar(service, state, df, cache, dry_run=False):
+    # Pull what changed in the calendar since the last import into df; a dry run leaves
+    # the stored token where it was
+    added, gone = cache.changes(service)
+    try:
+        df, new_rows, removed = merge_changes(None if dry_run else state, df, added, gone)
+    except Exception:
+        cache.rollback()
+        raise
+    if dry_run:
+        cache.rollback()
+    else:
+        cache.commit()
+    return df, new_rows, removed
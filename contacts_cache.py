@@ -0,0 +1,140 @@
+import json
+import sqlite3
+
+from people_api import list_connections, slim_contact
+
+CONTACTS_CACHE_PATH = "./contacts_cache.sqlite3"
+SCHEMA_VERSION = "1"
+
+
+def is_expired_sync_token(error):
+    # People API rejects stale tokens with 410 Gone / EXPIRED_SYNC_TOKEN
+    status = getattr(getattr(error, "resp", None), "status", None)
+    content = getattr(error, "content", b"") or b""
+    if isinstance(content, bytes):
+        content = content.decode("utf-8", "replace")
+    return status == 410 or "EXPIRED_SYNC_TOKEN" in content or "EXPIRED_SYNC_TOKEN" in str(error)
+
+
+class ContactsCache:
+    # On-disk copy of the connection list, refreshed through syncToken deltas
+
+    def __init__(self, path=CONTACTS_CACHE_PATH):
+        self.path = path
+        # Pages may be consumed from the loader thread after the first one
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS contacts (
+                resource_name TEXT PRIMARY KEY,
+                etag TEXT,
+                names TEXT,
+                birthdays TEXT
+            );
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            """
+        )
+        if self.get_meta("schema_version") != SCHEMA_VERSION:
+            self.clear()
+            self.set_meta("schema_version", SCHEMA_VERSION)
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        if value is None:
+            self.conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+        else:
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    @property
+    def sync_token(self):
+        return self.get_meta("sync_token")
+
+    def clear(self):
+        self.conn.execute("DELETE FROM contacts")
+        self.set_meta("sync_token", None)
+
+    def load(self):
+        contacts = []
+        for resource_name, etag, names, birthdays in self.conn.execute(
+            "SELECT resource_name, etag, names, birthdays FROM contacts ORDER BY rowid"
+        ):
+            contact = {"resourceName": resource_name}
+            if etag:
+                contact["etag"] = etag
+            if names:
+                contact["names"] = json.loads(names)
+            if birthdays:
+                contact["birthdays"] = json.loads(birthdays)
+            contacts.append(contact)
+        return contacts
+
+    def _apply(self, people):
+        deleted = []
+        rows = []
+        for person in people:
+            if person.get("metadata", {}).get("deleted"):
+                deleted.append((person["resourceName"],))
+                continue
+            contact = slim_contact(person)
+            rows.append(
+                (
+                    contact["resourceName"],
+                    contact.get("etag"),
+                    json.dumps(contact["names"]) if "names" in contact else None,
+                    json.dumps(contact["birthdays"]) if "birthdays" in contact else None,
+                )
+            )
+        if deleted:
+            self.conn.executemany("DELETE FROM contacts WHERE resource_name = ?", deleted)
+        if rows:
+            self.conn.executemany("INSERT OR REPLACE INTO contacts VALUES (?, ?, ?, ?)", rows)
+
+    def _sync(self, service, sync_token=None):
+        # Yields slimmed pages; the token is only stored once every page has landed
+        page_token = None
+        params = {"requestSyncToken": True}
+        if sync_token:
+            params["syncToken"] = sync_token
+        while True:
+            results = list_connections(
+                service, page_token, person_fields="names,birthdays,metadata", **params
+            )
+            people = results.get("connections", [])
+            self._apply(people)
+            page_token = results.get("nextPageToken")
+            next_sync_token = results.get("nextSyncToken")
+            del results
+            yield [slim_contact(p) for p in people if not p.get("metadata", {}).get("deleted")]
+            if not page_token:
+                break
+        self.set_meta("sync_token", next_sync_token)
+        self.conn.commit()
+
+    def iter_pages(self, service):
+        # Incremental refresh when a token is stored, full (streamed) fetch otherwise
+        sync_token = self.sync_token
+        if sync_token:
+            try:
+                for _ in self._sync(service, sync_token):
+                    pass
+                yield self.load()
+                return
+            except Exception as e:
+                self.conn.rollback()
+                if not is_expired_sync_token(e):
+                    raise
+        self.clear()
+        yield from self._sync(service)
+
+    def refresh(self, service):
+        contacts = []
+        for page in self.iter_pages(service):
+            contacts.extend(page)
+        return contacts
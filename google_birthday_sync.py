@@ -1,82 +1,67 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import pandas as pd
-import os
-import pickle
 import threading
+from collections import Counter
+from concurrent.futures import as_completed
 import platform
-from rapidfuzz import process, fuzz
-from ics import Calendar
 
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-
-CSV_PATH = "./calendar.csv"
-SCOPES = ["https://www.googleapis.com/auth/contacts"]
+import async_people
+from api_executor import ApiExecutor, calendar_service, people_service
+from bulk_jobs import COMMITTED, FAILED, IN_FLIGHT, JobLog, job_log_path
+from calendar_source import CALENDAR_SCOPE, CalendarCache, merge_changes
+from contacts_cache import ContactsCache
+from ics_import import find_new_events
+from match_cache import MatchCache
+from metrics import METRICS, timed
+from matching import (
+    CREATE_NEW_CONTACT,
+    MatchEngine,
+    NameSearchIndex,
+    match_names,
+    merge_matches,
+)
+from people_api import (
+    BIRTHDAY_CONFLICT,
+    BIRTHDAY_NOOP,
+    SCOPES,
+    ContactStore,
+    authenticate_google,
+    birthday_change,
+    display_name,
+    format_birthdays,
+    chunk_items,
+    create_contact,
+    create_contacts,
+)
+from state_store import (
+    CSV_PATH,
+    CsvStateStore,
+    JournalStateStore,
+    pending_mask,
+    repeated_titles,
+)
+from ui_events import UiEventQueue
+
+AUTOCOMPLETE_DEBOUNCE_MS = 120
+AUTOCOMPLETE_LIMIT = 20  # Suggestions shown in the autocomplete listbox
+REPAINT_INTERVAL_MS = 16  # Coalesce list changes into at most one repaint per frame
+UI_DRAIN_INTERVAL_MS = 50  # How often worker events are applied to the widgets
+DIAGNOSTICS_COLUMNS = (
+    "count", "errors", "total_s", "mean_ms", "p50_ms", "p95_ms", "max_ms", "bytes"
+)
 LANGUAGES = ["en", "pt", "es"]  # Add more as needed
 
 
-def authenticate_google():
-    creds = None
-    if os.path.exists("token.pickle"):
-        with open("token.pickle", "rb") as token:
-            creds = pickle.load(token)
-    if not creds or not creds.valid:
-        flow = InstalledAppFlow.from_client_secrets_file("credentials.json", SCOPES)
-        creds = flow.run_local_server(port=0)
-        with open("token.pickle", "wb") as token:
-            pickle.dump(creds, token)
-    return creds
-
-
-def get_contacts(service):
-    results = (
-        service.people()
-        .connections()
-        .list(resourceName="people/me", pageSize=500, personFields="names,birthdays")
-        .execute()
-    )
-    return results.get("connections", [])
-
-
-def get_contact_details(service, resource_name):
-    # Fetch full contact details including etag
-    return (
-        service.people()
-        .get(resourceName=resource_name, personFields="names,birthdays,metadata")
-        .execute()
-    )
-
-
-def update_birthday(service, contact, birthday_str):
-    year, month, day = birthday_str.split("-")
-    # Only include month and day, omit year
-    birthday = {
-        "etag": contact.get("etag")
-        or (contact.get("metadata", {}).get("sources", [{}])[0].get("etag")),
-        "birthdays": [{"date": {"month": int(month), "day": int(day)}}],
-    }
-    service.people().updateContact(
-        resourceName=contact["resourceName"], updatePersonFields="birthdays", body=birthday
-    ).execute()
-
-
-def create_contact(service, name, birthday_str):
-    year, month, day = birthday_str.split("-")
-    # Only include month and day, omit year
-    contact_body = {
-        "names": [{"displayName": name}],
-        "birthdays": [{"date": {"month": int(month), "day": int(day)}}],
-    }
-    service.people().createContact(body=contact_body).execute()
-
-
 class AutocompleteEntry(tk.Entry):
     def __init__(self, contacts, textvariable, parent, callback, *args, **kwargs):
         super().__init__(parent, textvariable=textvariable, *args, **kwargs)
-        self.contacts = contacts
+        # Accept a shared NameSearchIndex, or a plain list of names
+        if not isinstance(contacts, NameSearchIndex):
+            contacts = NameSearchIndex(contacts)
+        self.search_index = contacts
         self.callback = callback
         self.listbox = None
+        self._search_job = None
         self.textvariable = textvariable
         self.parent = parent
         self.bind("<KeyRelease>", self.on_keyrelease)
@@ -122,11 +107,18 @@ class AutocompleteEntry(tk.Entry):
                     self.listbox.yview_scroll(1, "units")
 
     def on_keyrelease(self, event=None):
+        # Debounce: only search once typing pauses
+        if self._search_job:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(AUTOCOMPLETE_DEBOUNCE_MS, self.show_suggestions)
+
+    def show_suggestions(self):
+        self._search_job = None
         value = self.textvariable.get()
         if value == "":
             self.hide_listbox()
             return
-        matches = [c for c in self.contacts if value.lower() in c.lower()]
+        matches = self.search_index.search(value, AUTOCOMPLETE_LIMIT)
         if not matches:
             self.hide_listbox()
             return
@@ -134,8 +126,7 @@ class AutocompleteEntry(tk.Entry):
             self.listbox = tk.Listbox(self.winfo_toplevel(), height=5)
             self.listbox.bind("<<ListboxSelect>>", self.on_select)
         self.listbox.delete(0, tk.END)
-        for match in matches:
-            self.listbox.insert(tk.END, match)
+        self.listbox.insert(tk.END, *matches)
         # Place listbox below entry
         x = self.winfo_rootx() - self.winfo_toplevel().winfo_rootx()
         y = self.winfo_rooty() - self.winfo_toplevel().winfo_rooty() + self.winfo_height()
@@ -151,27 +142,274 @@ class AutocompleteEntry(tk.Entry):
             self.hide_listbox()
 
     def hide_listbox(self, event=None):
+        if event is not None and self._search_job:
+            # Focus left the entry: drop the pending search so it can't reopen the list
+            self.after_cancel(self._search_job)
+            self._search_job = None
         if self.listbox:
             self.listbox.place_forget()
 
 
+class VirtualList(ttk.Frame):
+    # Scrollable list that only creates widgets for the visible rows and rebinds
+    # them to other items while scrolling; items are plain data
+    def __init__(self, parent, make_row, bind_row, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.items = []
+        self.make_row = make_row  # make_row(parent) -> row widget
+        self.bind_row = bind_row  # bind_row(row widget, item)
+        self.rows = []
+        self.first = 0
+        self.row_height = None
+        self._removed = set()
+        self._refresh_job = None
+        self.body = ttk.Frame(self)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.body.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.body.bind("<Configure>", lambda e: self.refresh())
+
+    def set_items(self, items):
+        self.items = items
+        self._removed.clear()
+        self.refresh()
+
+    def append(self, item):
+        self.items.append(item)
+        self.schedule_refresh()
+
+    def remove(self, item):
+        # Removals are applied in one pass on the next repaint
+        self._removed.add(id(item))
+        self.schedule_refresh()
+
+    def schedule_refresh(self):
+        if self._refresh_job is None:
+            self._refresh_job = self.after(REPAINT_INTERVAL_MS, self.flush)
+
+    def flush(self):
+        # Apply pending changes now (also called before reading items)
+        if self._refresh_job is not None:
+            self.after_cancel(self._refresh_job)
+            self._refresh_job = None
+        if self._removed:
+            # Compare by identity; items are dicts that may be equal by value
+            self.items[:] = [item for item in self.items if id(item) not in self._removed]
+            self._removed.clear()
+        self.refresh()
+
+    def visible_count(self):
+        return max(1, self.body.winfo_height() // self.row_height + 1)
+
+    def refresh(self):
+        if self.row_height is None:
+            row = self.make_row(self.body)
+            self.rows.append(row)
+            row.update_idletasks()
+            self.row_height = max(1, row.winfo_reqheight() + 4)
+        visible = self.visible_count()
+        while len(self.rows) < visible:
+            self.rows.append(self.make_row(self.body))
+        self.first = max(0, min(self.first, len(self.items) - visible + 1))
+        for i, row in enumerate(self.rows):
+            k = self.first + i
+            if i < visible and k < len(self.items):
+                self.bind_row(row, self.items[k])
+                row.place(x=0, y=i * self.row_height, relwidth=1, height=self.row_height)
+            else:
+                row.place_forget()
+        if self.items:
+            total = len(self.items)
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + visible) / total))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def yview(self, *args):
+        if not self.items or self.row_height is None:
+            return
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * len(self.items))
+        elif args[0] == "scroll":
+            step = self.visible_count() - 1 if args[2] == "pages" else 1
+            self.first += int(args[1]) * max(1, step)
+        self.refresh()
+
+    def yview_scroll(self, number, what):
+        self.yview("scroll", number, what)
+
+
+class PendingRow(ttk.Frame):
+    # Recycled widgets for one visible Main-tab row; state lives in self.item
+    def __init__(self, parent, app):
+        super().__init__(parent)
+        self.app = app
+        self.item = None
+        self.is_compact = False
+        self.selected_var = tk.BooleanVar(value=False)
+        self.match_var = tk.StringVar()
+        self.search_var = tk.StringVar()
+        # Combobox label -> resourceName (or CREATE_NEW_CONTACT) for the bound item
+        self.choices = {}
+        self.selected_var.trace_add("write", lambda *a: self._store("selected", self.selected_var))
+        self.match_var.trace_add("write", lambda *a: self._store_match())
+        self.search_var.trace_add("write", lambda *a: self._store("search", self.search_var))
+
+        # Configure grid weights
+        self.grid_columnconfigure(1, weight=1)  # Title column expands
+
+        # Left side: checkbox and title
+        ttk.Checkbutton(self, variable=self.selected_var).grid(row=0, column=0, padx=2, sticky="w")
+        self.title_label = ttk.Label(self)
+        self.title_label.grid(row=0, column=1, padx=5, sticky="w")
+
+        # Center: match dropdown
+        self.combobox = ttk.Combobox(self, textvariable=self.match_var, width=20, state="readonly")
+        self.combobox.grid(row=0, column=2, padx=2, sticky="w")
+
+        # Search section
+        search_frame = ttk.Frame(self)
+        search_frame.grid(row=0, column=3, padx=5, sticky="w")
+        ttk.Label(search_frame, text="Search:").grid(row=0, column=0, padx=2)
+        self.autocomplete = AutocompleteEntry(
+            app.name_index, self.search_var, search_frame, self.choose_name, width=15
+        )
+        self.autocomplete.grid(row=0, column=1, padx=2)
+
+        # Right side: action buttons
+        self.right_frame = ttk.Frame(self)
+        self.right_frame.grid(row=0, column=4, padx=5, sticky="e")
+        self.buttons = []
+        self.more_btn = None
+        for col, (label, action) in enumerate(self.actions()):
+            btn = ttk.Button(self.right_frame, text=label, command=self._run(action))
+            btn.grid(row=0, column=col, padx=1)
+            self.buttons.append(btn)
+
+    def actions(self):
+        return [
+            ("Update", self.app.set_and_update_entry),
+            ("New", self.app.create_new_contact_ui),
+            ("Remove", self.app.remove_entry),
+        ]
+
+    def _run(self, action):
+        # Act on whichever item the row shows when clicked
+        return lambda: self.item is not None and action(self.item)
+
+    def _store(self, key, var):
+        if self.item is not None:
+            self.item[key] = var.get()
+
+    def _store_match(self):
+        if self.item is not None:
+            label = self.match_var.get()
+            self.item["match"] = self.choices.get(label, label)
+
+    def _set_choices(self, choices):
+        labels = [self.app.choice_label(c) for c in choices]
+        self.choices = dict(zip(labels, choices))
+        self.combobox["values"] = labels
+
+    def choose_name(self, name):
+        # Autocomplete yields a display name: offer every contact carrying it, first selected
+        resources = self.app.contact_store.resources(name)
+        if self.item is None or not resources:
+            return
+        rest = [c for c in self.item["match_list"] if c not in resources]
+        self.item["match_list"] = resources + rest
+        self._set_choices(self.item["match_list"])
+        self.match_var.set(self.app.choice_label(resources[0]))
+
+    def bind_item(self, item):
+        # Point the row at a new item before touching the variables so traces write to it
+        self.item = item
+        self.selected_var.set(item["selected"])
+        choices = item["match_list"]
+        if item["match"] not in choices:
+            choices = choices + [item["match"]]
+        self._set_choices(choices)
+        self.match_var.set(self.app.choice_label(item["match"]))
+        self.search_var.set(item["search"])
+        self.title_label.config(text=f"{item['title']} ({item['date']})")
+        self.config(style="Repeated.TFrame" if item["repeated"] else "TFrame")
+
+    def set_compact(self, is_compact):
+        if is_compact == self.is_compact:
+            return
+        if is_compact:
+            # Hide individual buttons, show more menu
+            for btn in self.buttons:
+                btn.grid_remove()
+            if self.more_btn is None:
+                more_menu = tk.Menu(self.right_frame, tearoff=0)
+                for label, action in self.actions():
+                    more_menu.add_command(label=label, command=self._run(action))
+                self.more_btn = ttk.Menubutton(self.right_frame, text="⋯", width=3)
+                self.more_btn["menu"] = more_menu
+                self.more_btn.grid(row=0, column=3, padx=2)
+            else:
+                self.more_btn.grid()
+        else:
+            # Show individual buttons, hide more menu
+            if self.more_btn is not None:
+                self.more_btn.grid_remove()
+            for btn in self.buttons:
+                btn.grid()
+        self.is_compact = is_compact
+
+
+class ProcessedRow(ttk.Frame):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title_label = ttk.Label(self)
+        self.title_label.pack(side=tk.LEFT, padx=5)
+        ttk.Label(self, text="Processed").pack(side=tk.LEFT, padx=5)
+
+    def bind_item(self, item):
+        self.title_label.config(text=f"{item['title']} ({item['date']})")
+
+
 class CalendarSyncApp(tk.Tk):
-    def __init__(self, df, contacts, service):
+    def __init__(
+        self, df=None, contacts=(), service=None, state=None, executor=None, jobs=None
+    ):
+        # df and service may be None while start_loading() fetches them
         super().__init__()
         self.title("Calendar Birthday Sync")
         self.geometry("1000x700")
         self.minsize(800, 500)
         self.df = df
-        self.contacts = contacts
+        # Persists done/removed transitions; see state_store
+        self.state = state or CsvStateStore(CSV_PATH)
+        # Checkpoints bulk creates/updates so a crashed run can be resumed; see bulk_jobs
+        self.jobs = jobs or JobLog(job_log_path(CSV_PATH))
+        self.contacts = list(contacts)
+        self.contact_store = ContactStore()
+        # Unique display names; matches are expanded to resourceNames through contact_store
+        self.contact_names = self.contact_store.add(self.contacts)
+        # Without per-thread connections the shared service must be used one call at a time
+        self.executor = executor or ApiExecutor(max_workers=1)
         self.service = service
-        self.contact_names = [c["names"][0]["displayName"] for c in contacts if c.get("names")]
+        # Ranked candidates persist across launches; only new titles or contacts are rescored
+        self.match_engine = MatchEngine(self.contact_names, cache=MatchCache())
+        # One search index shared by every row's AutocompleteEntry
+        self.name_index = NameSearchIndex(self.contact_names)
         self.entries = []
         self.processed_entries = []
+        # Titles seen with several dates; grows as .ics imports add rows
+        self.repeated_titles = set()
         self.errors = []
         self.progress = 0
         self.total = 0
         self.removed_entries = set()
+        # Rows whose single Update/New request is still out; a second click is ignored
+        self.single_in_flight = set()
+        # Worker threads never touch widgets; they post here and drain_events applies it
+        self.events = UiEventQueue()
         self.setup_ui()
+        self.after(UI_DRAIN_INTERVAL_MS, self.drain_events)
+        # Build the autocomplete index before the first keystroke needs it
+        self.after_idle(self.name_index.sync)
         self.update_idletasks()
         self.focus_force()
         self.after(100, self.focus_force)
@@ -186,16 +424,41 @@ class CalendarSyncApp(tk.Tk):
         self.main_frame = ttk.Frame(self.notebook)
         self.processed_frame = ttk.Frame(self.notebook)
         self.error_frame = ttk.Frame(self.notebook)
+        self.diagnostics_frame = ttk.Frame(self.notebook)
         self.notebook.add(self.main_frame, text="Main")
         self.notebook.add(self.processed_frame, text="Processed")
         self.notebook.add(self.error_frame, text="Errors")
+        self.notebook.add(self.diagnostics_frame, text="Diagnostics")
         self.notebook.pack(fill=tk.BOTH, expand=True)
         self.paned.add(self.notebook, weight=3)
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
 
         # Error tab
         self.error_listbox = tk.Listbox(self.error_frame)
         self.error_listbox.pack(fill=tk.BOTH, expand=True)
 
+        # Diagnostics tab: per-operation timings and bytes from the metrics registry
+        diagnostics_bar = ttk.Frame(self.diagnostics_frame)
+        diagnostics_bar.pack(side=tk.TOP, fill=tk.X)
+        ttk.Button(diagnostics_bar, text="Refresh", command=self.refresh_diagnostics).pack(
+            side=tk.LEFT, padx=2, pady=2
+        )
+        ttk.Button(
+            diagnostics_bar, text="Export JSON...", command=lambda: self.export_metrics("json")
+        ).pack(side=tk.LEFT, padx=2, pady=2)
+        ttk.Button(
+            diagnostics_bar,
+            text="Export Prometheus...",
+            command=lambda: self.export_metrics("prometheus"),
+        ).pack(side=tk.LEFT, padx=2, pady=2)
+        self.diagnostics_tree = ttk.Treeview(self.diagnostics_frame, columns=DIAGNOSTICS_COLUMNS)
+        self.diagnostics_tree.heading("#0", text="operation")
+        self.diagnostics_tree.column("#0", width=220)
+        for column in DIAGNOSTICS_COLUMNS:
+            self.diagnostics_tree.heading(column, text=column)
+            self.diagnostics_tree.column(column, width=70, anchor="e")
+        self.diagnostics_tree.pack(fill=tk.BOTH, expand=True)
+
         # Bottom bar for progress and bulk action buttons
         bottom_bar = ttk.Frame(self)
         bottom_bar.pack(side=tk.BOTTOM, fill=tk.X)
@@ -228,18 +491,20 @@ class CalendarSyncApp(tk.Tk):
         ttk.Button(import_bar, text="Import .ics file", command=self.import_ics_file).pack(
             side=tk.LEFT, padx=5, pady=5
         )
+        ttk.Button(
+            import_bar, text="Import from Google Calendar", command=self.import_google_calendar
+        ).pack(side=tk.LEFT, padx=5, pady=5)
+
+        # Style for repeated events
+        style = ttk.Style()
+        style.configure("Repeated.TFrame", background="#ffe4e1")
 
-        # Scrollable frame for entries (Main)
-        canvas = tk.Canvas(self.main_frame)
-        scrollbar = ttk.Scrollbar(self.main_frame, orient="vertical", command=canvas.yview)
-        self.entries_frame = ttk.Frame(canvas)
-        self.entries_frame.bind(
-            "<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
+        # Virtualized list for entries (Main): widgets only for the visible rows
+        self.pending_view = VirtualList(
+            self.main_frame, lambda parent: PendingRow(parent, self), self.bind_pending_row
         )
-        canvas.create_window((0, 0), window=self.entries_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.pending_view.pack(fill=tk.BOTH, expand=True)
+        canvas = self.pending_view
 
         # Use an "active canvas" approach to capture mousewheel/trackpad reliably on macOS
         self._active_scroll_canvas = None
@@ -265,22 +530,15 @@ class CalendarSyncApp(tk.Tk):
         canvas.bind("<Enter>", on_enter)
         canvas.bind("<Leave>", on_leave)
 
-        # Scrollable frame for processed entries
-        proc_canvas = tk.Canvas(self.processed_frame)
-        proc_scrollbar = ttk.Scrollbar(
-            self.processed_frame, orient="vertical", command=proc_canvas.yview
-        )
-        self.processed_entries_frame = ttk.Frame(proc_canvas)
-        self.processed_entries_frame.bind(
-            "<Configure>", lambda e: proc_canvas.configure(scrollregion=proc_canvas.bbox("all"))
+        # Virtualized list for processed entries
+        self.processed_view = VirtualList(
+            self.processed_frame, ProcessedRow, lambda row, item: row.bind_item(item)
         )
-        proc_canvas.create_window((0, 0), window=self.processed_entries_frame, anchor="nw")
-        proc_canvas.configure(yscrollcommand=proc_scrollbar.set)
-        proc_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        proc_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.processed_view.pack(fill=tk.BOTH, expand=True)
 
-        self.populate_entries()
-        self.populate_processed_entries()
+        if self.df is not None:
+            self.populate_entries()
+            self.populate_processed_entries()
 
     def _on_mousewheel(self, event):
         # Scroll the currently active canvas (set on Enter)
@@ -315,364 +573,729 @@ class CalendarSyncApp(tk.Tk):
             elif getattr(event, "num", None) == 5:
                 canvas.yview_scroll(1, "units")
 
+    def on_tab_changed(self, event=None):
+        if self.notebook.select() == str(self.diagnostics_frame):
+            self.refresh_diagnostics()
+
+    def refresh_diagnostics(self):
+        snapshot = METRICS.snapshot()
+        byte_counts = dict(snapshot["bytes"])
+
+        def ms(seconds):
+            return "" if seconds is None else f"{1000 * seconds:.1f}"
+
+        self.diagnostics_tree.delete(*self.diagnostics_tree.get_children())
+        for name, op in snapshot["operations"].items():
+            values = (
+                op["count"],
+                op["errors"],
+                f"{op['sum_seconds']:.3f}",
+                ms(op["mean_seconds"]),
+                ms(op["p50_seconds"]),
+                ms(op["p95_seconds"]),
+                ms(op["max_seconds"]),
+                byte_counts.pop(name, ""),
+            )
+            self.diagnostics_tree.insert("", tk.END, text=name, values=values)
+        # Byte counters with no timed operation of the same name (e.g. http.received)
+        for name, n in byte_counts.items():
+            self.diagnostics_tree.insert("", tk.END, text=name, values=("",) * 7 + (n,))
+
+    def export_metrics(self, fmt):
+        if fmt == "prometheus":
+            extension, filetypes = ".prom", [("Prometheus text", "*.prom")]
+        else:
+            extension, filetypes = ".json", [("JSON", "*.json")]
+        path = filedialog.asksaveasfilename(
+            defaultextension=extension,
+            initialfile=f"sync_metrics{extension}",
+            filetypes=filetypes,
+        )
+        if not path:
+            return
+        try:
+            METRICS.export(path, fmt)
+        except OSError as e:
+            messagebox.showerror("Export Error", str(e))
+
+    def start_loading(self):
+        # Load the CSV, sign in and fetch contacts off the Tk thread; rows appear as soon as
+        # the CSV is read and their matches fill in page by page
+        self.status_label.config(text="Loading...")
+        threading.Thread(target=self._startup_thread, daemon=True).start()
+
+    def _startup_thread(self):
+        try:
+            df = self.state.load()
+            unfinished = self.jobs.load()
+            titles = [t for t in df.loc[pending_mask(df), "Title"].unique() if isinstance(t, str)]
+            self.events.call(self.set_calendar, df)
+            self.events.status("Signing in...")
+            creds = authenticate_google()
+            # Every request is rate limited and retried; bulk batches run on a worker pool
+            executor, service = people_service(creds)
+            self.events.call(self.set_service, service, executor)
+            self.events.status("Loading contacts...")
+            # With a warm cache this is a single syncToken delta request
+            self._load_contacts(ContactsCache().iter_pages(service), titles)
+            if unfinished:
+                # Reconciling needs the contact list, including what the crashed run created
+                self.events.call(self.resume_jobs, unfinished)
+        except Exception as e:
+            self.events.error(f"Startup: {str(e)}")
+            self.events.status("Ready")
+
+    def set_calendar(self, df):
+        self.df = df
+        self.populate_entries()
+        self.populate_processed_entries()
+
+    def set_service(self, service, executor):
+        self.service = service
+        self.executor = executor
+
+    def signed_in(self):
+        if self.service is None:
+            messagebox.showinfo("Info", "Still signing in to Google, try again in a moment.")
+            return False
+        return True
+
     def import_ics_file(self):
+        if self.df is None:
+            return
         file_path = filedialog.askopenfilename(filetypes=[("ICS files", "*.ics")])
         if not file_path:
             return
+        # Parse on a background thread against a snapshot of the known (Title, Start) pairs
+        existing = set(zip(self.df["Title"], self.df["Start"]))
+        self.status_label.config(text="Importing...")
+        self.progress_var.set(0)
+        threading.Thread(
+            target=self._import_ics_thread, args=(file_path, existing), daemon=True
+        ).start()
+
+    @timed("ui.import_ics")
+    def _import_ics_thread(self, file_path, existing):
+        def progress(fraction):
+            self.events.progress(100 * fraction)
+
+        try:
+            new_rows = find_new_events(file_path, existing, progress=progress)
+        except Exception as e:
+            self.events.call(self._import_failed, str(e))
+            return
+        self.events.call(self._finish_import, new_rows)
+
+    def _import_failed(self, message):
+        self.status_label.config(text="Ready")
+        messagebox.showerror("Import Error", message)
+
+    def _finish_import(self, new_rows):
+        self.status_label.config(text="Ready")
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                c = Calendar(f.read())
-            new_rows = []
-            for event in c.events:
-                title = event.name
-                start = event.begin.format("YYYY-MM-DD")
-                # Check for duplicates in CSV
-                if not ((self.df["Title"] == title) & (self.df["Start"] == start)).any():
-                    new_rows.append(
-                        {"Title": title, "Start": start, "done": False, "removed": False}
-                    )
+            # Rows added by something else since the snapshot are dropped here
+            existing = set(zip(self.df["Title"], self.df["Start"]))
+            new_rows = [r for r in new_rows if (r["Title"], r["Start"]) not in existing]
             if new_rows:
-                self.df = pd.concat([self.df, pd.DataFrame(new_rows)], ignore_index=True)
-                # Ensure all rows have 'done' and 'removed' columns
-                for col in ["done", "removed"]:
-                    if col not in self.df.columns:
-                        self.df[col] = False
-                    self.df[col] = self.df[col].fillna(False).astype(bool)
-                self.df.to_csv(CSV_PATH, index=False)
+                known = len(self.df)
+                self.df = self.state.append_rows(self.df, new_rows)
                 messagebox.showinfo("Import", f"Imported {len(new_rows)} new events.")
-                self.populate_entries()
-                self.populate_processed_entries()
+                # Imported rows are pending, so only the pending list grows
+                self.add_entries(self.df.index[known:])
                 self.update_idletasks()
             else:
                 messagebox.showinfo("Import", "No new events found in .ics file.")
         except Exception as e:
             messagebox.showerror("Import Error", str(e))
 
-    def fuzzy_match(self, calendar_title):
-        matches = process.extract(calendar_title, self.contact_names, scorer=fuzz.WRatio, limit=10)
-        matches = sorted(matches, key=lambda x: x[1], reverse=True)
-        return [m[0] for m in matches if m[1] > 60] or ["<Create new contact>"]
-
-    def populate_entries(self):
-        # Clear previous
-        for widget in self.entries_frame.winfo_children():
-            widget.destroy()
-        self.entries = []
-        # Detect repeated titles (same title, different dates)
-        title_counts = self.df.groupby("Title")["Start"].nunique()
-        repeated_titles = set(title_counts[title_counts > 1].index)
-
-        for idx, row in self.df.iterrows():
-            if row.get("done", False) or row.get("removed", False):
-                continue
-            entry = {}
-            entry["idx"] = idx
-            entry["title"] = row["Title"]
-            entry["date"] = row["Start"]
-            entry["selected"] = tk.BooleanVar(value=False)
-            entry["match_list"] = self.fuzzy_match(row["Title"])
-            entry["match_var"] = tk.StringVar(value=entry["match_list"][0])
-
-            # Main frame
-            entry["frame"] = frame = ttk.Frame(self.entries_frame)
-            frame.pack(fill=tk.X, padx=2, pady=2)
-
-            # Configure grid weights
-            frame.grid_columnconfigure(1, weight=1)  # Title column expands
-
-            # Highlight repeated titles
-            if row["Title"] in repeated_titles:
-                frame.config(style="Repeated.TFrame")
-
-            # Left side: checkbox and title
-            ttk.Checkbutton(frame, variable=entry["selected"]).grid(
-                row=0, column=0, padx=2, sticky="w"
-            )
-            ttk.Label(frame, text=f"{row['Title']} ({row['Start']})").grid(
-                row=0, column=1, padx=5, sticky="w"
-            )
-
-            # Center: match dropdown
-            entry["combobox"] = cb = ttk.Combobox(
-                frame,
-                values=entry["match_list"],
-                textvariable=entry["match_var"],
-                width=20,
-                state="readonly",
-            )
-            cb.grid(row=0, column=2, padx=2, sticky="w")
-
-            # Search section
-            search_frame = ttk.Frame(frame)
-            search_frame.grid(row=0, column=3, padx=5, sticky="w")
-
-            ttk.Label(search_frame, text="Search:").grid(row=0, column=0, padx=2)
-            entry["search_var"] = tk.StringVar()
-
-            def set_match(val, e=entry):
-                e["match_var"].set(val)
-
-            autocomplete = AutocompleteEntry(
-                self.contact_names, entry["search_var"], search_frame, set_match, width=15
-            )
-            autocomplete.grid(row=0, column=1, padx=2)
-            entry["autocomplete"] = autocomplete
-
-            # Right side: action buttons
-            entry["right_frame"] = right_frame = ttk.Frame(frame)
-            right_frame.grid(row=0, column=4, padx=5, sticky="e")
+    def import_google_calendar(self):
+        if self.df is None or not self.signed_in():
+            return
+        self.status_label.config(text="Importing from Google Calendar...")
+        threading.Thread(target=self._import_calendar_thread, daemon=True).start()
 
-            # Individual action buttons
-            update_btn = ttk.Button(
-                right_frame, text="Update", command=lambda e=entry: self.set_and_update_entry(e)
-            )
-            update_btn.grid(row=0, column=0, padx=1)
-            entry["update_btn"] = update_btn
+    @timed("ui.import_calendar")
+    def _import_calendar_thread(self):
+        # Only events changed since the last import are fetched once a token is stored
+        try:
+            creds = authenticate_google(scopes=SCOPES + [CALENDAR_SCOPE])
+            executor, service = calendar_service(creds)
+            try:
+                cache = CalendarCache()
+                added, gone = cache.changes(service)
+            finally:
+                executor.shutdown()
+        except Exception as e:
+            self.events.call(self._import_failed, str(e))
+            return
+        self.events.call(self._finish_calendar_import, cache, added, gone)
 
-            new_btn = ttk.Button(
-                right_frame, text="New", command=lambda e=entry: self.create_new_contact_ui(e)
-            )
-            new_btn.grid(row=0, column=1, padx=1)
-            entry["new_btn"] = new_btn
+    def _finish_calendar_import(self, cache, added, gone):
+        self.status_label.config(text="Ready")
+        try:
+            known = len(self.df)
+            self.df, new_rows, removed = merge_changes(self.state, self.df, added, gone)
+            # The token only advances once the rows are persisted
+            cache.commit()
+        except Exception as e:
+            cache.rollback()
+            messagebox.showerror("Import Error", str(e))
+            return
+        finally:
+            cache.close()
+        if removed:
+            removed = set(removed)
+            for entry in [e for e in self.entries if e["idx"] in removed]:
+                self.pending_view.remove(entry)
+        if new_rows:
+            self.add_entries(self.df.index[known:])
+        messagebox.showinfo(
+            "Import",
+            f"Imported {len(new_rows)} new events"
+            + (f", removed {len(removed)} deleted or changed ones." if removed else "."),
+        )
 
-            remove_btn = ttk.Button(
-                right_frame, text="Remove", command=lambda e=entry: self.remove_entry(e)
+    def score_matches(self, calendar_title, names=None):
+        return self.match_engine.match(calendar_title, names)
+
+    @timed("ui.fuzzy_match")
+    def fuzzy_match(self, calendar_title, scored=None):
+        # Dropdown choices: resourceNames of every contact behind each matched name
+        if scored is None:
+            scored = self.score_matches(calendar_title)
+        choices = []
+        for name in match_names(scored):
+            if name == CREATE_NEW_CONTACT:
+                choices.append(name)
+            else:
+                choices.extend(self.contact_store.resources(name))
+        return choices or [CREATE_NEW_CONTACT]
+
+    def choice_label(self, choice):
+        if choice == CREATE_NEW_CONTACT:
+            return choice
+        return self.contact_store.label(choice)
+
+    def score_all(self, titles, names=None):
+        # One batched cdist pass over every title instead of one extract per row
+        return self.match_engine.match_all([t for t in titles if isinstance(t, str)], names)
+
+    def _load_contacts(self, pages, titles):
+        # Worker thread: each page's names are scored against `titles` here, so the Tk
+        # thread only merges the results
+        for page in pages:
+            if not page:
+                continue
+            names = list(dict.fromkeys(n for n in map(display_name, page) if n))
+            scores = self.match_engine.match_all(titles, names) if titles and names else {}
+            self.events.call(self.add_contacts, page, scores)
+        self.events.status("Ready")
+
+    def add_contacts(self, page, scores=None):
+        # scores: {title: [(name, score)]} for the page's names, if already computed
+        self.contacts.extend(page)
+        added = [c for c in page if c["resourceName"] not in self.contact_store]
+        new_names = self.contact_store.add(page)
+        # Names already listed that this page adds another contact under: titles matched
+        # to them need that contact in their dropdown too
+        grown = {display_name(c) for c in added} - set(new_names) - {None}
+        # Extend in place so AutocompleteEntry instances see the new names
+        self.contact_names.extend(new_names)
+        self.after_idle(self.name_index.sync)
+        self.status_label.config(text=f"Loading contacts... ({len(self.contacts)})")
+        if not new_names and not grown:
+            return
+        # Score the new names only and merge, instead of rescoring everything
+        titles = {e["title"] for e in self.entries}
+        if not new_names:
+            new_scores = {}
+        elif scores is None:
+            new_scores = self.score_all(list(titles), new_names)
+        else:
+            # Names already seen on an earlier page are merged once; rows imported after
+            # the loader's snapshot are scored here
+            fresh = set(new_names)
+            new_scores = {t: [m for m in s if m[0] in fresh] for t, s in scores.items()}
+            missing = [t for t in titles if t not in new_scores]
+            if missing:
+                new_scores.update(self.score_all(missing, new_names))
+        # Rows sharing a title share their scores, so merge once per title
+        merged = {}
+        for entry in self.entries:
+            title = entry["title"]
+            if title not in merged:
+                scored = entry["match_scores"]
+                if new_scores.get(title):
+                    scored = merge_matches(scored, new_scores[title])
+                elif not any(name in grown for name, _ in scored):
+                    merged[title] = None
+                    continue
+                merged[title] = (scored, self.fuzzy_match(title, scored))
+            if merged[title] is None:
+                continue
+            previous = entry["match_list"]
+            entry["match_scores"], entry["match_list"] = merged[title]
+            # Only replace the suggestion if the user hasn't picked something else
+            if entry["match"] == previous[0]:
+                entry["match"] = entry["match_list"][0]
+        self.pending_view.schedule_refresh()
+
+    def report_error(self, *messages):
+        self.errors.extend(messages)
+        self.error_listbox.insert(tk.END, *messages)
+
+    def drain_events(self):
+        # Apply everything the workers posted since the last tick in one pass
+        batch = self.events.drain()
+        try:
+            if batch["errors"]:
+                self.report_error(*batch["errors"])
+            if batch["done"]:
+                self.move_entries_to_processed(batch["done"])
+            for fn, args in batch["calls"]:
+                # One failing callback must not drop the rest of the tick
+                try:
+                    fn(*args)
+                except Exception as e:
+                    self.report_error(f"{getattr(fn, '__name__', fn)}: {str(e)}")
+            if batch["progress"] is not None:
+                self.progress_var.set(batch["progress"])
+            if batch["status"] is not None:
+                self.status_label.config(text=batch["status"])
+        finally:
+            self.after(UI_DRAIN_INTERVAL_MS, self.drain_events)
+
+    @timed("ui.populate_entries")
+    def populate_entries(self):
+        # Pending rows and repeated titles (same title, different dates) come from
+        # vectorized masks; rows are plain data and PendingRow widgets are bound to them
+        # only while visible
+        self.repeated_titles = repeated_titles(self.df)
+        pending = self.df[pending_mask(self.df)]
+        self.entries = self.make_entries(pending)
+        self.pending_view.set_items(self.entries)
+
+    def add_entries(self, index):
+        # Pending rows appended at `index`; only titles they share can become repeated
+        new = self.df.loc[index]
+        titles = new["Title"].unique()
+        related = self.df[self.df["Title"].isin(titles)]
+        repeated = repeated_titles(related) - self.repeated_titles
+        self.repeated_titles |= repeated
+        if repeated:
+            for entry in self.entries:
+                if entry["title"] in repeated:
+                    entry["repeated"] = True
+        for entry in self.make_entries(new[pending_mask(new)]):
+            self.pending_view.append(entry)
+
+    def make_entries(self, rows):
+        # Scores and dropdown choices are computed once per distinct title and shared by
+        # every row carrying it
+        titles = [t for t in rows["Title"].unique() if isinstance(t, str)]
+        scores = self.score_all(titles)
+        matches = {}
+        for title in titles:
+            scored = scores.get(title, [])
+            matches[title] = (scored, self.fuzzy_match(title, scored))
+        entries = []
+        for idx, title, date in zip(
+            rows.index.tolist(), rows["Title"].tolist(), rows["Start"].tolist()
+        ):
+            scored, match_list = matches.get(title) or ([], self.fuzzy_match(title, []))
+            entries.append(
+                {
+                    "idx": idx,
+                    "title": title,
+                    "date": date,
+                    "repeated": title in self.repeated_titles,
+                    "selected": False,
+                    "match_scores": scored,
+                    "match_list": match_list,
+                    "match": match_list[0],
+                    "search": "",
+                }
             )
-            remove_btn.grid(row=0, column=2, padx=1)
-            entry["remove_btn"] = remove_btn
+        return entries
 
-            self.entries.append(entry)
-
-            # Apply responsive layout
-            self.update_entry_layout(entry)
-
-        # Style for repeated events
-        style = ttk.Style()
-        style.configure("Repeated.TFrame", background="#ffe4e1")
+    def bind_pending_row(self, row, entry):
+        row.bind_item(entry)
+        self.update_entry_layout(row)
 
     def on_window_resize(self, event=None):
         if event and event.widget == self:
-            # Update all entry rows for responsiveness
-            for entry in self.entries:
-                self.update_entry_layout(entry)
-
-    def update_entry_layout(self, entry):
-        # Check if we need to show compact layout
-        window_width = self.winfo_width()
-        is_compact = window_width < 1000
-
-        if is_compact and not hasattr(entry, "_is_compact"):
-            # Switch to compact layout
-            self.make_entry_compact(entry)
-        elif not is_compact and hasattr(entry, "_is_compact"):
-            # Switch to full layout
-            self.make_entry_full(entry)
-
-    def make_entry_compact(self, entry):
-        # Hide individual buttons, show more menu
-        if "update_btn" in entry:
-            entry["update_btn"].grid_remove()
-            entry["new_btn"].grid_remove()
-            entry["remove_btn"].grid_remove()
-
-        if "more_btn" not in entry:
-            # Create more menu
-            more_menu = tk.Menu(entry["right_frame"], tearoff=0)
-            more_menu.add_command(
-                label="Update", command=lambda e=entry: self.set_and_update_entry(e)
-            )
-            more_menu.add_command(
-                label="New", command=lambda e=entry: self.create_new_contact_ui(e)
-            )
-            more_menu.add_command(label="Remove", command=lambda e=entry: self.remove_entry(e))
-
-            more_btn = ttk.Menubutton(entry["right_frame"], text="⋯", width=3)
-            more_btn["menu"] = more_menu
-            more_btn.grid(row=0, column=3, padx=2)
-            entry["more_btn"] = more_btn
-        else:
-            entry["more_btn"].grid()
+            # Only the recycled row widgets need a layout update
+            for row in self.pending_view.rows:
+                self.update_entry_layout(row)
 
-        entry["_is_compact"] = True
-
-    def make_entry_full(self, entry):
-        # Show individual buttons, hide more menu
-        if "more_btn" in entry:
-            entry["more_btn"].grid_remove()
-
-        if "update_btn" in entry:
-            entry["update_btn"].grid()
-            entry["new_btn"].grid()
-            entry["remove_btn"].grid()
-
-        if hasattr(entry, "_is_compact"):
-            delattr(entry, "_is_compact")
+    def update_entry_layout(self, row):
+        # Compact layout folds the action buttons into a "more" menu
+        row.set_compact(self.winfo_width() < 1000)
 
     def bulk_action(self, action):
-        selected_entries = [e for e in self.entries if e["selected"].get()]
+        self.pending_view.flush()
+        selected_entries = [e for e in self.entries if e["selected"]]
         if not selected_entries:
             messagebox.showinfo("Info", "No entries selected.")
             return
 
         if action == "remove":
             # Bulk remove - mark as removed and refresh UI
+            self.state.mark(self.df, [e["idx"] for e in selected_entries], "removed")
             for entry in selected_entries:
-                idx = entry["idx"]
-                self.df.loc[idx, "removed"] = True
-                entry["frame"].destroy()
-            self.df.to_csv(CSV_PATH, index=False)
+                self.pending_view.remove(entry)
+            return
+        if not self.signed_in():
             return
-
-        # For update and create actions, use threading
-        self.progress = 0
-        self.total = len(selected_entries)
-        self.status_label.config(text=f"Processing {action}...")
-        self.progress_var.set(0)
 
         if action == "update":
+            # Re-read stale contacts first so planning compares against current birthdays
+            self.status_label.config(text="Checking contacts...")
             threading.Thread(
-                target=self._update_contacts_thread, args=(selected_entries,), daemon=True
+                target=self._refresh_contacts_thread, args=(selected_entries,), daemon=True
             ).start()
         elif action == "create":
+            self._start_bulk(action, len(selected_entries))
             threading.Thread(
                 target=self._create_contacts_thread, args=(selected_entries,), daemon=True
             ).start()
 
+    def _start_bulk(self, action, total):
+        self.progress = 0
+        self.total = total
+        self.status_label.config(text=f"Processing {action}...")
+        self.progress_var.set(0)
+
+    def _refresh_contacts_thread(self, selected_entries):
+        matched = [e["match"] for e in selected_entries if e["match"] in self.contact_store]
+        try:
+            # One getBatchGet per 200 contacts not fetched within the TTL
+            if self.executor.loop is not None:
+                self.executor.transport.run(
+                    async_people.refresh(self.executor, self.contact_store, matched)
+                )
+            else:
+                self.contact_store.refresh(self.service, matched)
+        except Exception as e:
+            self.events.error(f"Refreshing contacts: {str(e)}")
+        self.events.call(self._update_selected, selected_entries)
+
+    def _update_selected(self, selected_entries):
+        plan = self.plan_updates(selected_entries)
+        if plan["noop"]:
+            # Already correct in Google: done locally, no API call
+            self.finish_locally([entry for entry, _ in plan["noop"]])
+        updates = plan["new"]
+        if plan["conflict"]:
+            overwrite = self.confirm_conflicts(plan["conflict"])
+            if overwrite is None:
+                self.status_label.config(text="Ready")
+                return
+            if overwrite:
+                updates += plan["conflict"]
+        total = len(plan["create"]) + len(updates) + len(plan["missing"])
+        if not total:
+            self.status_label.config(text=f"Done ({len(plan['noop'])} already up to date)")
+            return
+        self._start_bulk("update", total)
+        threading.Thread(
+            target=self._update_contacts_thread,
+            args=(plan["create"], updates, plan["missing"]),
+            daemon=True,
+        ).start()
+
+    def plan_updates(self, entries):
+        # Classify rows before anything is sent: "create", "missing" -> [entry];
+        # "new", "conflict", "noop" -> [(entry, contact)] by what the write would change
+        plan = {"create": [], "missing": [], "new": [], "conflict": [], "noop": []}
+        for entry in entries:
+            if entry["match"] == CREATE_NEW_CONTACT:
+                plan["create"].append(entry)
+                continue
+            contact = self.contact_store.get(entry["match"])
+            if contact is None:
+                plan["missing"].append(entry)
+                continue
+            change = birthday_change(contact, entry["date"])
+            key = {BIRTHDAY_NOOP: "noop", BIRTHDAY_CONFLICT: "conflict"}.get(change, "new")
+            plan[key].append((entry, contact))
+        return plan
+
+    def confirm_conflicts(self, conflicts, shown=10):
+        # True: overwrite, False: skip those rows, None: cancel the whole action
+        lines = [
+            f"{entry['title']}: {entry['date'][5:]} (contact has {format_birthdays(contact)})"
+            for entry, contact in conflicts[:shown]
+        ]
+        if len(conflicts) > shown:
+            lines.append(f"... and {len(conflicts) - shown} more")
+        return messagebox.askyesnocancel(
+            "Conflicting birthdays",
+            f"{len(conflicts)} contact(s) already have a different birthday:\n\n"
+            + "\n".join(lines)
+            + "\n\nOverwrite them? Choose No to skip these rows and leave them pending.",
+        )
+
+    def finish_locally(self, entries):
+        self.state.mark(self.df, [e["idx"] for e in entries], "done")
+        self.move_entries_to_processed(entries)
+
+    def resume_jobs(self, unfinished):
+        # Bulk actions interrupted by a crash: rows whose request already reached Google
+        # are finished locally, and the rest can be sent again as a new job
+        pending = {entry["idx"]: entry for entry in self.entries}
+        landed = {}
+        remaining = {}
+        for job in unfinished:
+            job_landed, job_remaining = self.jobs.reconcile(job, self.contact_store, self.df)
+            landed.update((row["idx"], row) for row in job_landed)
+            remaining.update((row["idx"], row) for row in job_remaining)
+        if landed:
+            self.finish_locally([pending[idx] for idx in landed if idx in pending])
+            for job in unfinished:
+                self.jobs.checkpoint(job, [idx for idx in landed if idx in job.rows], COMMITTED)
+        rows = [row for idx, row in remaining.items() if idx in pending and idx not in landed]
+        for job in unfinished:
+            self.jobs.finish(job)
+        if not rows or not messagebox.askyesno(
+            "Resume bulk action",
+            f"A bulk action was interrupted ({len(landed)} row(s) had already gone through).\n\n"
+            f"Send the remaining {len(rows)} row(s) now? Choose No to leave them pending.",
+        ):
+            return
+        creates, updates, missing = [], [], []
+        for row in rows:
+            entry = pending[row["idx"]]
+            if row["resourceName"] is None:
+                creates.append(entry)
+            elif row["resourceName"] in self.contact_store:
+                updates.append((entry, self.contact_store.get(row["resourceName"])))
+            else:
+                missing.append(entry)
+        self._start_bulk("resume", len(rows))
+        threading.Thread(
+            target=self._update_contacts_thread, args=(creates, updates, missing), daemon=True
+        ).start()
+
+    def _start_job(self, creates, updates):
+        # Record the rows about to be sent before the first request goes out
+        rows = [{"idx": e["idx"], "title": e["title"], "date": e["date"]} for e in creates]
+        rows += [
+            {
+                "idx": e["idx"],
+                "title": e["title"],
+                "date": e["date"],
+                "resourceName": contact["resourceName"],
+            }
+            for e, contact in updates
+        ]
+        return self.jobs.start(rows)
+
+    @staticmethod
+    def _chunk_errors(entries, results):
+        # [(entry, error message or None)] from people_api's [(person, error)]
+        return [
+            (entry, None if error is None else str(error))
+            for entry, (_, error) in zip(entries, results)
+        ]
+
+    def _create_chunk(self, chunk, job):
+        # chunk: [entry]; returns [(entry, error message)]
+        self.jobs.checkpoint(job, [entry["idx"] for entry in chunk], IN_FLIGHT)
+        try:
+            results = create_contacts(self.service, [(e["title"], e["date"]) for e in chunk])
+        except Exception as e:
+            return [(entry, str(e)) for entry in chunk]
+        return self._chunk_errors(chunk, results)
+
+    def _update_chunk(self, chunk, job):
+        # chunk: [(entry, contact)] with unique contacts; returns [(entry, error message)]
+        self.jobs.checkpoint(job, [entry["idx"] for entry, _ in chunk], IN_FLIGHT)
+        try:
+            results = self.contact_store.update_birthdays(
+                self.service, [(contact["resourceName"], entry["date"]) for entry, contact in chunk]
+            )
+        except Exception as e:
+            return [(entry, str(e)) for entry, _ in chunk]
+        return self._chunk_errors([entry for entry, _ in chunk], results)
+
+    # The same chunks as coroutines for the asyncio transport, run on its event loop
+
+    async def _create_chunk_async(self, chunk, job):
+        self.jobs.checkpoint(job, [entry["idx"] for entry in chunk], IN_FLIGHT)
+        try:
+            results = await async_people.create_contacts(
+                self.executor, [(e["title"], e["date"]) for e in chunk]
+            )
+        except Exception as e:
+            return [(entry, str(e)) for entry in chunk]
+        return self._chunk_errors(chunk, results)
+
+    async def _update_chunk_async(self, chunk, job):
+        self.jobs.checkpoint(job, [entry["idx"] for entry, _ in chunk], IN_FLIGHT)
+        try:
+            results = await async_people.update_birthdays(
+                self.executor,
+                self.contact_store,
+                [(contact["resourceName"], entry["date"]) for entry, contact in chunk],
+            )
+        except Exception as e:
+            return [(entry, str(e)) for entry, _ in chunk]
+        return self._chunk_errors([entry for entry, _ in chunk], results)
+
+    def _chunk_functions(self):
+        # (create, update) chunk functions for the executor's transport
+        if self.executor.loop is not None:
+            return self._create_chunk_async, self._update_chunk_async
+        return self._create_chunk, self._update_chunk
+
+    def _finish_rows(self, results, verb, job=None):
+        # results: [(entry, error message or None)]; persist once per chunk
+        done = [entry for entry, error in results if error is None]
+        failed = [entry for entry, error in results if error is not None]
+        for entry, error in results:
+            if error is not None:
+                self.events.error(f"{entry['title']}: {error}")
+        if done:
+            self.state.mark(self.df, [e["idx"] for e in done], "done")
+            self.events.rows_done(done)
+        if job is not None:
+            self.jobs.checkpoint(job, [e["idx"] for e in done], COMMITTED)
+            self.jobs.checkpoint(job, [e["idx"] for e in failed], FAILED)
+        self.progress += len(results)
+        self.events.progress(100 * self.progress / self.total)
+        self.events.status(f"{verb} {self.progress}/{self.total}")
+
+    def _run_chunks(self, rounds, verb, job):
+        # rounds: [[(chunk function, chunk)]]. The chunks of a round run concurrently on
+        # the executor and are finished on this thread as they complete; rounds run one
+        # after another.
+        for chunks in rounds:
+            futures = {self.executor.submit(fn, chunk, job): chunk for fn, chunk in chunks}
+            for future in as_completed(futures):
+                try:
+                    results = future.result()
+                except Exception as e:
+                    chunk = futures[future]
+                    results = [
+                        (item[0] if isinstance(item, tuple) else item, str(e)) for item in chunk
+                    ]
+                self._finish_rows(results, verb, job)
+        self.jobs.finish(job)
+
     def _create_contacts_thread(self, selected_entries):
-        for i, entry in enumerate(selected_entries):
-            idx = entry["idx"]
-            try:
-                create_contact(self.service, entry["title"], entry["date"])
-                self.df.loc[idx, "done"] = True
-                self.df.to_csv(CSV_PATH, index=False)
-                self.after(0, self.move_entry_to_processed, entry)
-            except Exception as e:
-                self.errors.append(f"{entry['title']}: {str(e)}")
-                self.error_listbox.insert(tk.END, f"{entry['title']}: {str(e)}")
-            self.progress = i + 1
-            self.progress_var.set(100 * self.progress / self.total)
-            self.status_label.config(text=f"Created {self.progress}/{self.total}")
-        self.status_label.config(text="Done")
-
-    # Remove the old update_selected_contacts method and rename _update_contacts_thread
-    def _update_contacts_thread(self, selected_entries):
-        for i, entry in enumerate(selected_entries):
-            contact_name = entry["match_var"].get()
-            idx = entry["idx"]
-            try:
-                if contact_name == "<Create new contact>":
-                    create_contact(self.service, entry["title"], entry["date"])
-                else:
-                    contact_obj = next(
-                        (
-                            c
-                            for c in self.contacts
-                            if c.get("names") and c["names"][0]["displayName"] == contact_name
-                        ),
-                        None,
-                    )
-                    if contact_obj:
-                        full_contact = get_contact_details(
-                            self.service, contact_obj["resourceName"]
-                        )
-                        update_birthday(self.service, full_contact, entry["date"])
-                    else:
-                        raise Exception("Contact not found")
-                self.df.loc[idx, "done"] = True
-                self.df.to_csv(CSV_PATH, index=False)
-                self.after(0, self.move_entry_to_processed, entry)
-            except Exception as e:
-                self.errors.append(f"{entry['title']}: {str(e)}")
-                self.error_listbox.insert(tk.END, f"{entry['title']}: {str(e)}")
-            self.progress = i + 1
-            self.progress_var.set(100 * self.progress / self.total)
-            self.status_label.config(text=f"Updated {self.progress}/{self.total}")
-        self.status_label.config(text="Done")
-
-    def move_entry_to_processed(self, entry):
-        # Remove from main entries frame
-        entry["frame"].destroy()
-        self.populate_processed_entries()
+        job = self._start_job(selected_entries, [])
+        create_chunk, _ = self._chunk_functions()
+        chunks = [(create_chunk, chunk) for chunk in chunk_items(selected_entries)]
+        self._run_chunks([chunks], "Created", job)
+        self.events.status("Done")
+
+    def _update_contacts_thread(self, creates, updates, missing):
+        # creates: [entry]; updates: [(entry, contact)]; missing: [entry] with no contact
+        if missing:
+            self._finish_rows([(entry, "Contact not found") for entry in missing], "Updated")
+        job = self._start_job(creates, updates)
+        create_chunk, update_chunk = self._chunk_functions()
+        # Rows pointing at the same contact go out one round after another, in row order:
+        # sent together they would race on the contact's etag
+        per_contact = Counter()
+        update_rounds = []
+        for entry, contact in updates:
+            n = per_contact[contact["resourceName"]]
+            per_contact[contact["resourceName"]] += 1
+            if n == len(update_rounds):
+                update_rounds.append([])
+            update_rounds[n].append((entry, contact))
+        rounds = [[(update_chunk, chunk) for chunk in chunk_items(r)] for r in update_rounds]
+        creates = [(create_chunk, chunk) for chunk in chunk_items(creates)]
+        if rounds:
+            rounds[0] = creates + rounds[0]
+        else:
+            rounds = [creates]
+        self._run_chunks(rounds, "Updated", job)
+        self.events.status("Done")
+
+    def move_entries_to_processed(self, entries):
+        # Move rows between the lists; both views repaint at most once per frame
+        for entry in entries:
+            self.pending_view.remove(entry)
+            self.processed_view.append(
+                {"idx": entry["idx"], "title": entry["title"], "date": entry["date"]}
+            )
 
     def remove_entry(self, entry):
-        idx = entry["idx"]
-        self.df.loc[idx, "removed"] = True
-        self.df.to_csv(CSV_PATH, index=False)
-        entry["frame"].destroy()
+        self.state.mark(self.df, [entry["idx"]], "removed")
+        self.pending_view.remove(entry)
 
     def populate_processed_entries(self):
-        for widget in self.processed_entries_frame.winfo_children():
-            widget.destroy()
-        self.processed_entries = []
-        for idx, row in self.df.iterrows():
-            if not row.get("done", False):
-                continue
-            frame = ttk.Frame(self.processed_entries_frame)
-            frame.pack(fill=tk.X, padx=2, pady=2)
-            ttk.Label(frame, text=f"{row['Title']} ({row['Start']})").pack(side=tk.LEFT, padx=5)
-            ttk.Label(frame, text="Processed").pack(side=tk.LEFT, padx=5)
-            self.processed_entries.append(frame)
+        done = self.df[self.df["done"]]
+        self.processed_entries = [
+            {"idx": idx, "title": title, "date": date}
+            for idx, title, date in zip(
+                done.index.tolist(), done["Title"].tolist(), done["Start"].tolist()
+            )
+        ]
+        self.processed_view.set_items(self.processed_entries)
 
     def set_and_update_entry(self, entry):
-        # Immediately update contact for this entry and mark as processed
-        contact_name = entry["match_var"].get()
-        idx = entry["idx"]
-        try:
-            if contact_name == "<Create new contact>":
-                create_contact(self.service, entry["title"], entry["date"])
-            else:
-                contact_obj = next(
-                    (
-                        c
-                        for c in self.contacts
-                        if c.get("names") and c["names"][0]["displayName"] == contact_name
-                    ),
-                    None,
-                )
-                if contact_obj:
-                    full_contact = get_contact_details(self.service, contact_obj["resourceName"])
-                    update_birthday(self.service, full_contact, entry["date"])
-                else:
-                    raise Exception("Contact not found")
-            self.df.loc[idx, "done"] = True
-            self.df.to_csv(CSV_PATH, index=False)
-            self.move_entry_to_processed(entry)
-        except Exception as e:
-            self.errors.append(f"{entry['title']}: {str(e)}")
-            self.error_listbox.insert(tk.END, f"{entry['title']}: {str(e)}")
+        # Update the contact for this entry and mark it as processed
+        if not self.signed_in() or entry["idx"] in self.single_in_flight:
+            return
+        if entry["match"] == CREATE_NEW_CONTACT:
+            self.create_new_contact_ui(entry)
+            return
+        if entry["match"] not in self.contact_store:
+            self.report_error(f"{entry['title']}: Contact not found")
+            return
+        contact = self.contact_store.get(entry["match"])
+        change = birthday_change(contact, entry["date"])
+        if change == BIRTHDAY_CONFLICT and not self.confirm_conflicts([(entry, contact)]):
+            return
+        if change == BIRTHDAY_NOOP:
+            # No API call when the contact already has this birthday
+            self.finish_locally([entry])
+            return
+        self._start_single(
+            entry, self.contact_store.update_birthday, self.service, entry["match"], entry["date"]
+        )
 
     def create_new_contact_ui(self, entry):
+        if not self.signed_in() or entry["idx"] in self.single_in_flight:
+            return
+        self._start_single(entry, create_contact, self.service, entry["title"], entry["date"])
+
+    def _start_single(self, entry, fn, *args):
+        # One row's request runs on a worker thread so rate-limit waits and backoff do
+        # not freeze the window; the result comes back through self.events
+        self.single_in_flight.add(entry["idx"])
+        threading.Thread(
+            target=self._single_thread, args=(entry, fn, *args), daemon=True
+        ).start()
+
+    def _single_thread(self, entry, fn, *args):
         try:
-            create_contact(self.service, entry["title"], entry["date"])
-            self.df.loc[entry["idx"], "done"] = True
-            self.df.to_csv(CSV_PATH, index=False)
-            self.move_entry_to_processed(entry)
+            fn(*args)
+            self.state.mark(self.df, [entry["idx"]], "done")
+            self.events.rows_done([entry])
         except Exception as e:
-            self.errors.append(f"{entry['title']}: {str(e)}")
-            self.error_listbox.insert(tk.END, f"{entry['title']}: {str(e)}")
+            self.events.error(f"{entry['title']}: {str(e)}")
+        finally:
+            self.events.call(self.single_in_flight.discard, entry["idx"])
 
 
 def main():
-    # Try to load CSV, create empty DataFrame if missing or empty
-    if not os.path.exists(CSV_PATH) or os.path.getsize(CSV_PATH) == 0:
-        df = pd.DataFrame(columns=["Title", "Start", "done", "removed"])
-        df.to_csv(CSV_PATH, index=False)
-    else:
-        df = pd.read_csv(CSV_PATH)
-        # Ensure required columns exist and fill missing values
-        for col in ["Title", "Start"]:
-            if col not in df.columns:
-                df[col] = ""
-        for col in ["done", "removed"]:
-            if col not in df.columns:
-                df[col] = False
-            df[col] = df[col].fillna(False).astype(bool)
-        df.to_csv(CSV_PATH, index=False)
-    creds = authenticate_google()
-    service = build("people", "v1", credentials=creds)
-    contacts = get_contacts(service)
-    app = CalendarSyncApp(df, contacts, service)
+    # Open the window right away; calendar.csv (plus any journal left by a crash),
+    # sign-in and contacts are loaded in the background
+    state = JournalStateStore(CSV_PATH)
+    jobs = JobLog(job_log_path(CSV_PATH))
+    app = CalendarSyncApp(state=state, jobs=jobs)
+    app.start_loading()
     app.mainloop()
+    if app.df is not None:
+        # Fold this session's journal back into calendar.csv
+        state.compact(app.df)
+    state.close()
+    jobs.close()
 
 
 if __name__ == "__main__":
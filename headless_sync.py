@@ -0,0 +1,392 @@
+# Unattended sync for servers: auto-applies confident matches, leaves the rest pending
+# for review in the desktop app and writes a JSON report. Does not import tkinter.
+#
+#   python headless_sync.py --ics export.ics --threshold 90 --report sync_report.json
+import argparse
+import json
+import sys
+from collections import Counter
+from concurrent.futures import as_completed
+from datetime import datetime, timezone
+
+from api_executor import (
+    API_CONCURRENCY,
+    PEOPLE_TRANSPORT,
+    TRANSPORTS,
+    calendar_service,
+    people_service,
+)
+from bulk_jobs import COMMITTED, FAILED, IN_FLIGHT, JobLog, job_log_path
+from calendar_source import CALENDAR_SCOPE, CalendarCache, import_calendar
+from contacts_cache import ContactsCache
+from ics_import import find_new_events
+from match_cache import MatchCache
+from matching import MATCH_THRESHOLD, MatchEngine
+from metrics import METRICS
+from people_api import (
+    BIRTHDAY_CONFLICT,
+    BIRTHDAY_NOOP,
+    SCOPES,
+    ContactStore,
+    authenticate_google,
+    birthday_change,
+    chunk_items,
+    create_contacts,
+    format_birthdays,
+)
+from state_store import CSV_PATH, JournalStateStore, add_rows, pending_mask
+
+AUTO_ACCEPT_THRESHOLD = 90
+# The best match must beat the next differently-named candidate by this much
+AUTO_ACCEPT_MARGIN = 5
+REPORT_PATH = "./sync_report.json"
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def plan_rows(
+    df,
+    store,
+    threshold=AUTO_ACCEPT_THRESHOLD,
+    margin=AUTO_ACCEPT_MARGIN,
+    create_unmatched=False,
+    match_cache=None,
+):
+    # Split pending rows into auto updates, auto creates, rows needing review and no-ops
+    # (the contact already has that birthday)
+    # store: ContactStore; its displayName index supplies the names and flags duplicates
+    engine = MatchEngine(list(store.by_name), cache=match_cache)
+    pending = df[pending_mask(df)]
+    scores = engine.match_all([t for t in pending["Title"] if isinstance(t, str)])
+
+    updates = []
+    creates = []
+    review = []
+    noops = []
+    for idx, title, date in zip(pending.index, pending["Title"], pending["Start"]):
+        row = {"idx": int(idx), "title": title, "date": date}
+        scored = [m for m in scores.get(title, []) if m[1] > MATCH_THRESHOLD]
+        if not scored:
+            if create_unmatched:
+                creates.append(row)
+            else:
+                review.append({**row, "reason": "no match", "candidates": []})
+            continue
+        name, score = scored[0]
+        runner_up = scored[1][1] if len(scored) > 1 else None
+        candidates = [{"name": n, "score": round(s, 1)} for n, s in scored]
+        if score < threshold:
+            reason = "below threshold"
+        elif runner_up is not None and score - runner_up < margin:
+            reason = "ambiguous"
+        elif len(store.resources(name)) > 1:
+            reason = "duplicate contact name"
+        else:
+            contact = store.get(store.resources(name)[0])
+            change = birthday_change(contact, date)
+            planned = {**row, "contact": contact, "name": name, "score": score}
+            if change == BIRTHDAY_NOOP:
+                noops.append(planned)
+            elif change == BIRTHDAY_CONFLICT:
+                review.append(
+                    {
+                        **row,
+                        "reason": "conflicting birthday",
+                        "existing": format_birthdays(contact),
+                        "candidates": candidates,
+                    }
+                )
+            else:
+                updates.append(planned)
+            continue
+        review.append({**row, "reason": reason, "candidates": candidates})
+
+    # Several rows pointing at one contact would overwrite each other: review them instead
+    targets = Counter(u["contact"]["resourceName"] for u in updates)
+    for u in [u for u in updates if targets[u["contact"]["resourceName"]] > 1]:
+        updates.remove(u)
+        candidates = [{"name": u["name"], "score": round(u["score"], 1)}]
+        review.append(
+            {
+                "idx": u["idx"],
+                "title": u["title"],
+                "date": u["date"],
+                "reason": "several rows match this contact",
+                "candidates": candidates,
+            }
+        )
+    return updates, creates, review, noops
+
+
+def _applied(row, action):
+    return {
+        "idx": row["idx"],
+        "title": row["title"],
+        "date": row["date"],
+        "action": action,
+        "contact": row.get("name"),
+        "score": round(row["score"], 1) if "score" in row else None,
+    }
+
+
+def apply_plan(service, state, df, store, updates, creates, executor=None, jobs=None):
+    # Send the planned mutations in batches, concurrently when an executor is given;
+    # returns (applied, errors). With a JobLog every row is checkpointed so an
+    # interrupted run can be reconciled by the next one.
+    applied = []
+    errors = []
+    job = None
+    if jobs is not None and (updates or creates):
+        job = jobs.start(
+            [{**u, "resourceName": u["contact"]["resourceName"]} for u in updates] + creates
+        )
+
+    def checkpoint(rows, row_state):
+        if job is not None:
+            jobs.checkpoint(job, [row["idx"] for row in rows], row_state)
+
+    def finish(rows, results, action):
+        done = []
+        failed = []
+        for row, (_, error) in zip(rows, results):
+            if error is None:
+                done.append(row)
+                applied.append(_applied(row, action))
+            else:
+                failed.append(row)
+                errors.append({"idx": row["idx"], "title": row["title"], "error": str(error)})
+        if done:
+            state.mark(df, [row["idx"] for row in done], "done")
+        checkpoint(done, COMMITTED)
+        checkpoint(failed, FAILED)
+
+    def update_items(chunk):
+        return [(u["contact"]["resourceName"], u["date"]) for u in chunk]
+
+    def create_items(chunk):
+        return [(c["title"], c["date"]) for c in chunk]
+
+    if executor is not None and executor.loop is not None:
+        # asyncio transport: chunks are coroutines on its event loop, not pool threads
+        import async_people
+
+        async def update_chunk(chunk):
+            checkpoint(chunk, IN_FLIGHT)
+            return await async_people.update_birthdays(executor, store, update_items(chunk))
+
+        async def create_chunk(chunk):
+            checkpoint(chunk, IN_FLIGHT)
+            return await async_people.create_contacts(executor, create_items(chunk))
+
+    else:
+
+        def update_chunk(chunk):
+            checkpoint(chunk, IN_FLIGHT)
+            return store.update_birthdays(service, update_items(chunk))
+
+        def create_chunk(chunk):
+            checkpoint(chunk, IN_FLIGHT)
+            return create_contacts(service, create_items(chunk))
+
+    chunks = [
+        (update_chunk, chunk, "update")
+        for chunk in chunk_items(updates, key=lambda u: u["contact"]["resourceName"])
+    ]
+    chunks += [(create_chunk, chunk, "create") for chunk in chunk_items(creates)]
+    if executor is None:
+        for fn, chunk, action in chunks:
+            finish(chunk, fn(chunk), action)
+    else:
+        futures = {executor.submit(fn, chunk): (chunk, action) for fn, chunk, action in chunks}
+        # Results are recorded on this thread so the state store sees one writer
+        for future in as_completed(futures):
+            chunk, action = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                results = [(None, e)] * len(chunk)
+            finish(chunk, results, action)
+    if job is not None:
+        jobs.finish(job)
+    return applied, errors
+
+
+def reconcile_jobs(state, df, store, jobs):
+    # Settle jobs a crashed run left behind. In-flight rows that already reached Google
+    # are marked done; everything else is still pending in df and gets planned again.
+    reconciled = []
+    for job in jobs.load():
+        landed, _ = jobs.reconcile(job, store, df)
+        if landed:
+            state.mark(df, [row["idx"] for row in landed], "done")
+            jobs.checkpoint(job, [row["idx"] for row in landed], COMMITTED)
+            reconciled += [_applied(row, "reconciled") for row in landed]
+        jobs.finish(job)
+    return reconciled
+
+
+def run_sync(
+    service,
+    state,
+    df,
+    contacts,
+    threshold=AUTO_ACCEPT_THRESHOLD,
+    margin=AUTO_ACCEPT_MARGIN,
+    create_unmatched=False,
+    dry_run=False,
+    executor=None,
+    match_cache=None,
+    jobs=None,
+):
+    started = _now()
+    store = ContactStore(contacts)
+    reconciled = []
+    if jobs is not None and not dry_run:
+        # Before planning, so rows created by the interrupted run aren't created twice
+        reconciled = reconcile_jobs(state, df, store, jobs)
+    updates, creates, review, noops = plan_rows(
+        df, store, threshold, margin, create_unmatched, match_cache
+    )
+    skipped = [_applied(n, "no-op") for n in noops]
+    if dry_run:
+        applied = [_applied(u, "update") for u in updates]
+        applied += [_applied(c, "create") for c in creates]
+        errors = []
+    else:
+        if noops:
+            # Already correct in Google: done locally, no API call
+            state.mark(df, [n["idx"] for n in noops], "done")
+        applied, errors = apply_plan(
+            service, state, df, store, updates, creates, executor, jobs
+        )
+        applied = reconciled + applied
+    return {
+        "started": started,
+        "finished": _now(),
+        "dry_run": dry_run,
+        "threshold": threshold,
+        "margin": margin,
+        "counts": {
+            "applied": len(applied),
+            "skipped": len(skipped),
+            "review": len(review),
+            "errors": len(errors),
+        },
+        "applied": applied,
+        "skipped": skipped,
+        "review": review,
+        "errors": errors,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync calendar birthdays without the UI")
+    parser.add_argument("--csv", default=CSV_PATH, help="calendar database (default: %(default)s)")
+    parser.add_argument("--ics", action="append", default=[], help=".ics file(s) to import first")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=AUTO_ACCEPT_THRESHOLD,
+        help="minimum match score to apply without review (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--margin",
+        type=float,
+        default=AUTO_ACCEPT_MARGIN,
+        help="required lead over the next candidate (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--create-unmatched",
+        action="store_true",
+        help="create contacts for rows with no match instead of queueing them for review",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=API_CONCURRENCY,
+        help="batch requests in flight at once (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--calendar",
+        metavar="CALENDAR_ID",
+        default=None,
+        help="import yearly events from this Google Calendar first ('primary' for your own); "
+        "after the first run only changes since the last import are fetched",
+    )
+    parser.add_argument(
+        "--transport",
+        choices=TRANSPORTS,
+        default=PEOPLE_TRANSPORT,
+        help="People API HTTP transport (default: %(default)s)",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="plan only; change nothing")
+    parser.add_argument("--report", default=REPORT_PATH, help="JSON report path, '-' for stdout")
+    parser.add_argument(
+        "--metrics",
+        default=None,
+        help="also write timing metrics here (.prom/.txt for Prometheus text, else JSON)",
+    )
+    args = parser.parse_args(argv)
+
+    state = JournalStateStore(args.csv)
+    df = state.load()
+    imported = 0
+    for path in args.ics:
+        new_rows = find_new_events(path, set(zip(df["Title"], df["Start"])))
+        if new_rows:
+            df = add_rows(df, new_rows) if args.dry_run else state.append_rows(df, new_rows)
+            imported += len(new_rows)
+
+    scopes = SCOPES + [CALENDAR_SCOPE] if args.calendar else SCOPES
+    creds = authenticate_google(interactive=False, scopes=scopes)
+    executor, service = people_service(creds, args.transport, args.concurrency)
+    calendar_removed = 0
+    if args.calendar:
+        calendar_cache = CalendarCache(calendar_id=args.calendar)
+        calendar_executor, calendar = calendar_service(creds)
+        df, new_rows, removed = import_calendar(
+            calendar, state, df, calendar_cache, args.dry_run
+        )
+        calendar_executor.shutdown()
+        calendar_cache.close()
+        imported += len(new_rows)
+        calendar_removed = len(removed)
+    contacts = ContactsCache().refresh(service)
+    jobs = JobLog(job_log_path(args.csv))
+    report = run_sync(
+        service,
+        state,
+        df,
+        contacts,
+        threshold=args.threshold,
+        margin=args.margin,
+        create_unmatched=args.create_unmatched,
+        dry_run=args.dry_run,
+        executor=executor,
+        match_cache=MatchCache(),
+        jobs=jobs,
+    )
+    executor.shutdown()
+    jobs.close()
+    report["counts"]["imported"] = imported
+    report["counts"]["calendar_removed"] = calendar_removed
+    report["counts"]["retries"] = executor.retries
+    if not args.dry_run:
+        state.compact(df)
+    state.close()
+
+    if args.metrics:
+        METRICS.export(args.metrics)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.report == "-":
+        print(text)
+    else:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import os
+
+from metrics import METRICS, timed
+
+IMPORT_CHUNK_SIZE = 1000
+
+
+def _split_property(line):
+    # "NAME;PARAM=x:VALUE" -> ("NAME", "VALUE"); ':' inside quoted params is not a separator
+    in_quotes = False
+    for i, ch in enumerate(line):
+        if ch == '"':
+            in_quotes = not in_quotes
+        elif ch == ":" and not in_quotes:
+            return line[:i].split(";", 1)[0].upper(), line[i + 1 :]
+    return line.split(";", 1)[0].upper(), ""
+
+
+def _unescape(text):
+    out = []
+    chars = iter(text)
+    for ch in chars:
+        if ch == "\\":
+            nxt = next(chars, "")
+            out.append("\n" if nxt in "nN" else nxt)
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def _date(value):
+    # DTSTART values are DATE (20240131) or DATE-TIME (20240131T090000[Z])
+    value = value.strip()
+    if len(value) < 8 or not value[:8].isdigit():
+        return None
+    return f"{value[:4]}-{value[4:6]}-{value[6:8]}"
+
+
+def _unfolded_lines(f):
+    # RFC 5545 line unfolding: continuation lines start with a space or tab
+    current = None
+    for raw in f:
+        line = raw.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def iter_events(f):
+    # Yield (title, "YYYY-MM-DD") for each VEVENT without building the calendar in memory
+    depth = 0  # Nested components inside a VEVENT (e.g. VALARM) are skipped
+    title = start = None
+    in_event = False
+    for line in _unfolded_lines(f):
+        name, value = _split_property(line)
+        if name == "BEGIN":
+            if value.strip().upper() == "VEVENT" and not in_event:
+                in_event, depth, title, start = True, 0, None, None
+            elif in_event:
+                depth += 1
+        elif name == "END" and in_event:
+            if depth:
+                depth -= 1
+            elif value.strip().upper() == "VEVENT":
+                in_event = False
+                if start:
+                    yield title or "", start
+        elif in_event and not depth:
+            if name == "SUMMARY":
+                title = _unescape(value)
+            elif name == "DTSTART":
+                start = _date(value)
+
+
+def iter_event_chunks(path, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    # Lists of up to chunk_size events; progress(fraction) reports how much was read
+    total = os.path.getsize(path) or 1
+    chunk = []
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for event in iter_events(f):
+            chunk.append(event)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+                if progress:
+                    progress(min(1.0, f.buffer.tell() / total))
+    if chunk:
+        yield chunk
+    if progress:
+        progress(1.0)
+
+
+@timed("ics.find_new_events")
+def find_new_events(path, existing_keys, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    # Rows for events whose (Title, Start) is not in existing_keys (or earlier in the file)
+    METRICS.add_bytes("ics.find_new_events", os.path.getsize(path))
+    seen = set(existing_keys)
+    new_rows = []
+    for chunk in iter_event_chunks(path, chunk_size, progress):
+        for title, start in chunk:
+            if (title, start) not in seen:
+                seen.add((title, start))
+                new_rows.append({"Title": title, "Start": start})
+    return new_rows
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import sqlite3
+import threading
+
+MATCH_CACHE_PATH = "./match_cache.sqlite3"
+MATCH_CACHE_MAX_ENTRIES = 50_000
+SCHEMA_VERSION = "1"
+# SQLite's default limit on bound parameters is 999 in older builds
+QUERY_CHUNK = 500
+
+
+def fingerprint(names, settings):
+    # Ranked candidates depend on the exact name list (ties keep the earlier name) and on
+    # every scorer setting, so both go into the key
+    digest = hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    for name in names:
+        digest.update(name.encode("utf-8", "surrogatepass"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class MatchCache:
+    # On-disk memo of title -> [(name, score)] per contact-set fingerprint, LRU-bounded
+
+    def __init__(self, path=MATCH_CACHE_PATH, max_entries=MATCH_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        # Used from the contact loader thread and the Tk thread
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS matches (
+                fingerprint TEXT,
+                title TEXT,
+                scores TEXT,
+                used INTEGER,
+                PRIMARY KEY (fingerprint, title)
+            );
+            CREATE INDEX IF NOT EXISTS matches_used ON matches (used);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            """
+        )
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        if not row or row[0] != SCHEMA_VERSION:
+            self.conn.execute("DELETE FROM matches")
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('schema_version', ?)", (SCHEMA_VERSION,)
+            )
+            self.conn.commit()
+        self.clock = self.conn.execute("SELECT COALESCE(MAX(used), 0) FROM matches").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+
+    def get_many(self, key, titles):
+        # {title: [(name, score)]} for the titles cached under `key`; marks them used
+        found = {}
+        with self.lock:
+            for start in range(0, len(titles), QUERY_CHUNK):
+                chunk = titles[start : start + QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT title, scores FROM matches WHERE fingerprint = ? "
+                    f"AND title IN ({placeholders})",
+                    (key, *chunk),
+                )
+                for title, scores in rows:
+                    found[title] = [(name, score) for name, score in json.loads(scores)]
+            if found:
+                self.clock += 1
+                self.conn.executemany(
+                    "UPDATE matches SET used = ? WHERE fingerprint = ? AND title = ?",
+                    [(self.clock, key, title) for title in found],
+                )
+                self.conn.commit()
+        return found
+
+    def put_many(self, key, scored):
+        # scored: {title: [(name, score)]}
+        if not scored:
+            return
+        with self.lock:
+            self.clock += 1
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO matches VALUES (?, ?, ?, ?)",
+                [(key, title, json.dumps(s), self.clock) for title, s in scored.items()],
+            )
+            excess = (
+                self.conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0] - self.max_entries
+            )
+            if excess > 0:
+                # Least recently used first
+                self.conn.execute(
+                    "DELETE FROM matches WHERE rowid IN "
+                    "(SELECT rowid FROM matches ORDER BY used LIMIT ?)",
+                    (excess,),
+                )
+            self.conn.commit()
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM matches")
+            self.conn.commit()
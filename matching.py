@@ -0,0 +1,300 @@
+import heapq
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from match_cache import fingerprint
+from metrics import timed
+
+CREATE_NEW_CONTACT = "<Create new contact>"
+MATCH_LIMIT = 10
+MATCH_THRESHOLD = 60
+# Upper bound on the score matrix held in memory at once (float64 cells)
+BLOCK_CELLS = 4_000_000
+# Below this many names scoring everything is cheap enough; skip the blocking index
+BLOCKING_MIN_NAMES = 5000
+NGRAM_SIZE = 3
+# Blocking recall knobs: share of n-grams a name must have in common with the title
+# (relative to the shorter of the two) and the cap on candidates scored per title.
+# WRatio rates names sharing a single token above MATCH_THRESHOLD, so the dropdown needs
+# a wide candidate set. With these values the scores offered above the threshold match
+# scoring every name (6k and 18k synthetic contacts); the names differ only where several
+# tie at the last place shown, for about 1% of titles, at a quarter of the cost.
+MIN_OVERLAP = 0.2
+MAX_CANDIDATES_RATIO = 0.2
+MIN_MAX_CANDIDATES = 50
+
+
+def extract_matches(title, names, limit=MATCH_LIMIT, scorer=fuzz.WRatio):
+    # Per-title path: same ranking as top_matches, one process.extract call
+    matches = process.extract(title, names, scorer=scorer, limit=limit)
+    return sorted(((m[0], m[1]) for m in matches), key=lambda x: x[1], reverse=True)
+
+
+def top_matches(titles, names, limit=MATCH_LIMIT, scorer=fuzz.WRatio, workers=-1):
+    # Score every title against every name with cdist and keep the top `limit` per title.
+    # Returns a list aligned with `titles` of [(name, score)] sorted best first.
+    if not titles:
+        return []
+    if not names:
+        return [[] for _ in titles]
+    limit = min(limit, len(names))
+    rows_per_block = max(1, BLOCK_CELLS // len(names))
+    results = []
+    for start in range(0, len(titles), rows_per_block):
+        block = titles[start : start + rows_per_block]
+        scores = process.cdist(block, names, scorer=scorer, dtype=np.float64, workers=workers)
+        # Score of the limit-th best name in each row
+        kth = np.partition(scores, len(names) - limit, axis=1)[:, len(names) - limit]
+        for row, cutoff in zip(scores, kth):
+            # Ties at the cutoff keep the earliest names, as process.extract does
+            above = np.flatnonzero(row > cutoff)
+            tied = np.flatnonzero(row == cutoff)[: limit - len(above)]
+            cols = np.concatenate((above, tied))
+            cols = cols[np.lexsort((cols, -row[cols]))]
+            results.append([(names[c], float(row[c])) for c in cols])
+    return results
+
+
+def fold(text):
+    # Accent- and case-insensitive form used for blocking
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def tokens(text):
+    return "".join(ch if ch.isalnum() else " " for ch in fold(text)).split()
+
+
+def ngrams(text, n=NGRAM_SIZE):
+    # Character n-grams of each padded token, so short tokens still produce grams
+    grams = set()
+    for token in tokens(text):
+        padded = f" {token} "
+        grams.update(padded[i : i + n] for i in range(max(1, len(padded) - n + 1)))
+    return grams
+
+
+class BlockingIndex:
+    # Inverted n-gram index that narrows a title to a small set of candidate names
+
+    def __init__(
+        self,
+        names,
+        n=NGRAM_SIZE,
+        min_overlap=MIN_OVERLAP,
+        max_candidates=None,
+    ):
+        # `names` may grow in place; new names are indexed on the next query
+        self.names = names
+        self.n = n
+        self.min_overlap = min_overlap
+        self.max_candidates = max_candidates
+        self.postings = defaultdict(list)
+        self.gram_counts = []
+        self._gram_count_array = np.empty(0, dtype=np.int32)
+        self._arrays = {}
+
+    def _sync(self):
+        start = len(self.gram_counts)
+        for i in range(start, len(self.names)):
+            grams = ngrams(self.names[i], self.n)
+            for gram in grams:
+                self.postings[gram].append(i)
+                self._arrays.pop(gram, None)
+            self.gram_counts.append(len(grams))
+        if start != len(self.gram_counts):
+            self._gram_count_array = np.array(self.gram_counts, dtype=np.int32)
+
+    def _posting(self, gram):
+        array = self._arrays.get(gram)
+        if array is None:
+            array = self._arrays[gram] = np.array(self.postings[gram], dtype=np.int32)
+        return array
+
+    def candidate_limit(self):
+        if self.max_candidates is not None:
+            return self.max_candidates
+        return max(MIN_MAX_CANDIDATES, int(len(self.names) * MAX_CANDIDATES_RATIO))
+
+    def candidates(self, title):
+        # Sorted indices of names worth scoring against `title`
+        self._sync()
+        grams = [g for g in ngrams(title, self.n) if g in self.postings]
+        if not grams:
+            return np.empty(0, dtype=np.int64)
+        hits = np.bincount(
+            np.concatenate([self._posting(g) for g in grams]), minlength=len(self.gram_counts)
+        )
+        overlap = hits / np.maximum(np.minimum(len(grams), self._gram_count_array), 1)
+        selected = np.flatnonzero(overlap >= self.min_overlap)
+        limit = self.candidate_limit()
+        if len(selected) > limit:
+            # Highest overlap first; earlier names win ties so results are stable
+            selected = selected[np.lexsort((selected, -overlap[selected]))[:limit]]
+        return np.sort(selected)
+
+
+class NameSearchIndex:
+    # Shared substring search over folded names for autocomplete, backed by a trigram
+    # index so a keystroke only verifies names containing every trigram of the query
+
+    def __init__(self, names, n=NGRAM_SIZE):
+        # `names` may grow in place; new names are indexed on the next query
+        self.names = names
+        self.n = n
+        self.folded = []
+        self.postings = defaultdict(set)
+
+    def sync(self):
+        # Index names appended since the last call
+        for i in range(len(self.folded), len(self.names)):
+            folded = fold(self.names[i])
+            self.folded.append(folded)
+            for j in range(len(folded) - self.n + 1):
+                self.postings[folded[j : j + self.n]].add(i)
+
+    def search(self, query, limit=None):
+        # Names containing `query`, earliest match position first, then list order
+        self.sync()
+        query = fold(query)
+        if not query:
+            return []
+        if len(query) < self.n:
+            candidates = range(len(self.folded))
+        else:
+            grams = {query[j : j + self.n] for j in range(len(query) - self.n + 1)}
+            sets = sorted((self.postings.get(g, set()) for g in grams), key=len)
+            candidates = sorted(set.intersection(*sets)) if sets[0] else []
+        hits = []
+        prefix_hits = 0
+        for i in candidates:
+            pos = self.folded[i].find(query)
+            if pos == -1:
+                continue
+            hits.append((pos, i))
+            if pos == 0:
+                prefix_hits += 1
+                # Candidates come in list order, so later names cannot outrank these
+                if limit is not None and prefix_hits >= limit:
+                    break
+        if limit is not None:
+            hits = heapq.nsmallest(limit, hits)
+        else:
+            hits.sort()
+        return [self.names[i] for _, i in hits]
+
+
+def merge_matches(*scored_lists, limit=MATCH_LIMIT):
+    merged = [m for scored in scored_lists for m in scored]
+    return sorted(merged, key=lambda x: x[1], reverse=True)[:limit]
+
+
+def match_names(scored, threshold=MATCH_THRESHOLD):
+    # Names for the match dropdown: anything above the threshold, else offer creation
+    return [m[0] for m in scored if m[1] > threshold] or [CREATE_NEW_CONTACT]
+
+
+class MatchEngine:
+    # Scores calendar titles against the contact names in batches; large name lists
+    # go through a BlockingIndex so only a small candidate set is scored per title
+
+    def __init__(
+        self,
+        names,
+        limit=MATCH_LIMIT,
+        scorer=fuzz.WRatio,
+        workers=-1,
+        blocking=None,
+        min_overlap=MIN_OVERLAP,
+        max_candidates=None,
+        cache=None,
+    ):
+        self.names = names
+        self.limit = limit
+        self.scorer = scorer
+        self.workers = workers
+        # None: decide from the number of names at query time
+        self.blocking = blocking
+        self.min_overlap = min_overlap
+        self.max_candidates = max_candidates
+        self.index = self._new_index(names)
+        # Index for the last other name list scored, e.g. a page of contacts
+        self._other_index = None
+        # Optional MatchCache; match_all only scores titles it has not seen for these names
+        self.cache = cache
+        self._names_key = (0, None)
+
+    def _new_index(self, names):
+        return BlockingIndex(
+            names, min_overlap=self.min_overlap, max_candidates=self.max_candidates
+        )
+
+    def use_blocking(self, names):
+        if self.blocking is None:
+            return len(names) >= BLOCKING_MIN_NAMES
+        return self.blocking
+
+    def blocking_index(self, names):
+        # The shared index for self.names; other lists (pages of contacts handed in by
+        # the loader) get their own, kept while the same list is being scored
+        if names is self.names:
+            return self.index
+        index = self._other_index
+        if index is None or index.names is not names:
+            index = self._other_index = self._new_index(names)
+        return index
+
+    def _match_blocked(self, title, index):
+        candidates = [index.names[i] for i in index.candidates(title)]
+        return extract_matches(title, candidates, self.limit, self.scorer)
+
+    def cache_key(self, names):
+        # Fingerprint of the name list plus everything that changes the ranking
+        if names is self.names and self._names_key[0] == len(names):
+            return self._names_key[1]
+        blocking = self.use_blocking(names)
+        index = self.blocking_index(names) if blocking else None
+        settings = {
+            "scorer": getattr(self.scorer, "__qualname__", repr(self.scorer)),
+            "limit": self.limit,
+            "blocking": blocking,
+            "ngram": NGRAM_SIZE,
+            "min_overlap": index.min_overlap if blocking else None,
+            "max_candidates": index.candidate_limit() if blocking else None,
+        }
+        key = fingerprint(names, settings)
+        if names is self.names:
+            # self.names only grows, so its length identifies the version hashed
+            self._names_key = (len(names), key)
+        return key
+
+    def _score_all(self, titles, names):
+        if self.use_blocking(names):
+            index = self.blocking_index(names)
+            return {title: self._match_blocked(title, index) for title in titles}
+        return dict(zip(titles, top_matches(titles, names, self.limit, self.scorer, self.workers)))
+
+    @timed("matching.match_all")
+    def match_all(self, titles, names=None):
+        # {title: [(name, score)]} for the unique titles given
+        names = self.names if names is None else names
+        unique = list(dict.fromkeys(titles))
+        if self.cache is None or not names:
+            return self._score_all(unique, names)
+        key = self.cache_key(names)
+        results = self.cache.get_many(key, unique)
+        missing = [title for title in unique if title not in results]
+        if missing:
+            scored = self._score_all(missing, names)
+            self.cache.put_many(key, scored)
+            results.update(scored)
+        return {title: results[title] for title in unique}
+
+    def match(self, title, names=None):
+        names = self.names if names is None else names
+        if self.use_blocking(names):
+            return self._match_blocked(title, self.blocking_index(names))
+        return extract_matches(title, names, self.limit, self.scorer)
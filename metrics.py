@@ -0,0 +1,171 @@
+import functools
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets; the last one catches the rest
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, math.inf
+)
+PROMETHEUS_PREFIX = "birthday_sync"
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.errors = 0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation, capped at the max seen
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class Metrics:
+    # Thread-safe registry of per-operation latency histograms and byte counters
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.bytes = {}
+        self.started = time.time()
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+            self.bytes = {}
+            self.started = time.time()
+
+    def observe(self, name, seconds, error=False):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+            if error:
+                histogram.errors += 1
+
+    def add_bytes(self, name, n):
+        if n:
+            with self.lock:
+                self.bytes[name] = self.bytes.get(name, 0) + n
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, error)
+
+    def timed(self, name):
+        # Decorator form of timer()
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return fn(*args, **kwargs)
+
+            return wrapper
+
+        return decorate
+
+    def snapshot(self):
+        with self.lock:
+            operations = {
+                name: {
+                    "count": h.count,
+                    "errors": h.errors,
+                    "sum_seconds": round(h.sum, 6),
+                    "mean_seconds": round(h.sum / h.count, 6) if h.count else None,
+                    "p50_seconds": h.quantile(0.5),
+                    "p95_seconds": h.quantile(0.95),
+                    "max_seconds": round(h.max, 6),
+                    "buckets": {
+                        ("+Inf" if math.isinf(b) else str(b)): c
+                        for b, c in zip(h.buckets, h.counts)
+                    },
+                }
+                for name, h in sorted(self.histograms.items())
+            }
+            return {
+                "started": self.started,
+                "operations": operations,
+                "bytes": dict(sorted(self.bytes.items())),
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        # Prometheus text exposition format (version 0.0.4)
+        duration = f"{PROMETHEUS_PREFIX}_operation_duration_seconds"
+        lines = [
+            f"# HELP {duration} Time spent in instrumented operations.",
+            f"# TYPE {duration} histogram",
+        ]
+        errors = []
+        with self.lock:
+            for name, h in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative += count
+                    le = "+Inf" if math.isinf(bound) else repr(bound)
+                    lines.append(f'{duration}_bucket{{op="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'{duration}_sum{{op="{name}"}} {h.sum!r}')
+                lines.append(f'{duration}_count{{op="{name}"}} {h.count}')
+                errors.append(
+                    f'{PROMETHEUS_PREFIX}_operation_errors_total{{op="{name}"}} {h.errors}'
+                )
+            byte_lines = [
+                f'{PROMETHEUS_PREFIX}_bytes_total{{op="{name}"}} {n}'
+                for name, n in sorted(self.bytes.items())
+            ]
+        lines += [
+            f"# HELP {PROMETHEUS_PREFIX}_operation_errors_total Instrumented calls that raised.",
+            f"# TYPE {PROMETHEUS_PREFIX}_operation_errors_total counter",
+            *errors,
+            f"# HELP {PROMETHEUS_PREFIX}_bytes_total Bytes read or written by an operation.",
+            f"# TYPE {PROMETHEUS_PREFIX}_bytes_total counter",
+            *byte_lines,
+        ]
+        return "\n".join(lines) + "\n"
+
+    def export(self, path, fmt=None):
+        # fmt: "json" or "prometheus"; by default Prometheus text for .prom/.txt files
+        if fmt is None:
+            fmt = "prometheus" if path.endswith((".prom", ".txt")) else "json"
+        text = self.to_prometheus() if fmt == "prometheus" else self.to_json() + "\n"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+# Process-wide registry used by the instrumented modules
+METRICS = Metrics()
+timed = METRICS.timed
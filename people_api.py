@@ -0,0 +1,514 @@
+import os
+import pickle
+import time
+from collections import defaultdict
+
+from metrics import timed
+
+SCOPES = ["https://www.googleapis.com/auth/contacts"]
+CONTACTS_PAGE_SIZE = 1000  # People API maximum for connections.list
+CONTACT_FIELDS = ("resourceName", "etag", "names", "birthdays")
+BATCH_SIZE = 200  # People API maximum for batchCreateContacts / batchUpdateContacts / getBatchGet
+DETAILS_TTL = 300  # Seconds a contact read from the API counts as current
+# What writing a birthday would do to a contact, see birthday_change
+BIRTHDAY_NOOP = "no-op"
+BIRTHDAY_NEW = "new"
+BIRTHDAY_CONFLICT = "conflict"
+
+
+def _save_token(creds):
+    with open("token.pickle", "wb") as token:
+        pickle.dump(creds, token)
+
+
+def refresh_credentials(creds):
+    # Renew an expired access token from the stored refresh token; False if that fails
+    from google.auth.exceptions import RefreshError
+    from google.auth.transport.requests import Request
+
+    try:
+        creds.refresh(Request())
+    except RefreshError:
+        return False
+    _save_token(creds)
+    return True
+
+
+def authenticate_google(interactive=True, scopes=SCOPES):
+    # The OAuth libraries are imported on demand so importing this module stays cheap.
+    # A stored token missing one of `scopes` (e.g. calendar access, asked for only when
+    # importing from Google Calendar) needs a fresh consent.
+    creds = None
+    if os.path.exists("token.pickle"):
+        with open("token.pickle", "rb") as token:
+            creds = pickle.load(token)
+    if creds and not creds.has_scopes(scopes):
+        if not interactive:
+            raise RuntimeError(
+                "token.pickle lacks access needed here; sign in again with the desktop app"
+            )
+        scopes = sorted(set(scopes) | set(creds.scopes or ()))
+        creds = None
+    if creds and not creds.valid and creds.expired and creds.refresh_token:
+        if refresh_credentials(creds):
+            return creds
+    if not creds or not creds.valid:
+        if not interactive:
+            raise RuntimeError("No valid token.pickle; sign in once with the desktop app")
+        from google_auth_oauthlib.flow import InstalledAppFlow
+
+        flow = InstalledAppFlow.from_client_secrets_file("credentials.json", scopes)
+        creds = flow.run_local_server(port=0)
+        _save_token(creds)
+    return creds
+
+
+def slim_contact(person):
+    # Keep only the fields the app uses so raw API responses can be freed
+    return {k: person[k] for k in CONTACT_FIELDS if k in person}
+
+
+def display_name(contact):
+    return contact["names"][0].get("displayName") if contact.get("names") else None
+
+
+@timed("people.list_connections")
+def list_connections(
+    service,
+    page_token=None,
+    page_size=CONTACTS_PAGE_SIZE,
+    person_fields="names,birthdays,metadata",
+    **params,
+):
+    # One connections.list request; extra params are passed through (e.g. syncToken)
+    kwargs = {
+        "resourceName": "people/me",
+        "pageSize": page_size,
+        "personFields": person_fields,
+        **params,
+    }
+    if page_token:
+        kwargs["pageToken"] = page_token
+    return service.people().connections().list(**kwargs).execute()
+
+
+def iter_contact_pages(service, page_size=CONTACTS_PAGE_SIZE):
+    # Follow nextPageToken and yield one slimmed page of contacts at a time
+    page_token = None
+    while True:
+        results = list_connections(service, page_token, page_size)
+        page = [slim_contact(c) for c in results.get("connections", [])]
+        page_token = results.get("nextPageToken")
+        del results
+        yield page
+        if not page_token:
+            break
+
+
+def iter_contacts(service, page_size=CONTACTS_PAGE_SIZE):
+    for page in iter_contact_pages(service, page_size):
+        yield from page
+
+
+@timed("people.get_contacts")
+def get_contacts(service):
+    return list(iter_contacts(service))
+
+
+@timed("people.get_contact_details")
+def get_contact_details(service, resource_name):
+    # Fetch full contact details including etag
+    return (
+        service.people()
+        .get(resourceName=resource_name, personFields="names,birthdays,metadata")
+        .execute()
+    )
+
+
+def birthday_field(birthday_str):
+    year, month, day = birthday_str.split("-")
+    # Only include month and day, omit year
+    return [{"date": {"month": int(month), "day": int(day)}}]
+
+
+@timed("people.get_contacts_batch")
+def get_contacts_batch(service, resource_names, person_fields="names,birthdays,metadata"):
+    # {resourceName: person} through people.getBatchGet, BATCH_SIZE names per request;
+    # contacts that no longer exist are left out
+    found = {}
+    for start in range(0, len(resource_names), BATCH_SIZE):
+        response = (
+            service.people()
+            .getBatchGet(
+                resourceNames=resource_names[start : start + BATCH_SIZE],
+                personFields=person_fields,
+            )
+            .execute()
+        )
+        found.update(batch_get_results(response))
+    return found
+
+
+def batch_get_results(response):
+    found = {}
+    for item in response.get("responses", []):
+        person, error = person_response_result(item)
+        if error is None and person:
+            found[person["resourceName"]] = person
+    return found
+
+
+def birthday_dates(contact):
+    # (month, day) of every structured birthday on the contact that has both
+    dates = []
+    for birthday in contact.get("birthdays", []):
+        date = birthday.get("date") or {}
+        if date.get("month") and date.get("day"):
+            dates.append((date["month"], date["day"]))
+    return dates
+
+
+def format_birthdays(contact):
+    return ", ".join(f"{month:02d}-{day:02d}" for month, day in birthday_dates(contact))
+
+
+def birthday_change(contact, birthday_str):
+    # BIRTHDAY_NOOP if the contact already has this month/day, BIRTHDAY_NEW if it has no
+    # birthday, BIRTHDAY_CONFLICT if it has a different one
+    _, month, day = birthday_str.split("-")
+    dates = birthday_dates(contact)
+    if (int(month), int(day)) in dates:
+        return BIRTHDAY_NOOP
+    return BIRTHDAY_CONFLICT if dates else BIRTHDAY_NEW
+
+
+def contact_etag(contact):
+    return contact.get("etag") or (
+        contact.get("metadata", {}).get("sources", [{}])[0].get("etag")
+    )
+
+
+def birthday_body(contact, birthday_str):
+    return {
+        "etag": contact_etag(contact),
+        "birthdays": birthday_field(birthday_str),
+    }
+
+
+@timed("people.update_birthday")
+def update_birthday(service, contact, birthday_str):
+    return (
+        service.people()
+        .updateContact(
+            resourceName=contact["resourceName"],
+            updatePersonFields="birthdays",
+            body=birthday_body(contact, birthday_str),
+        )
+        .execute()
+    )
+
+
+def contact_body(name, birthday_str):
+    return {
+        "names": [{"displayName": name}],
+        "birthdays": birthday_field(birthday_str),
+    }
+
+
+@timed("people.create_contact")
+def create_contact(service, name, birthday_str):
+    return service.people().createContact(body=contact_body(name, birthday_str)).execute()
+
+
+def chunk_items(items, size=BATCH_SIZE, key=None):
+    # Split into chunks of at most `size`; items sharing a key go to separate chunks
+    chunks = []
+    for item in items:
+        k = key(item) if key else None
+        for chunk, seen in chunks:
+            if len(chunk) < size and (k is None or k not in seen):
+                break
+        else:
+            chunk, seen = [], set()
+            chunks.append((chunk, seen))
+        chunk.append(item)
+        if k is not None:
+            seen.add(k)
+    return [chunk for chunk, _ in chunks]
+
+
+class PersonResponseError(Exception):
+    # A single failed item inside a batch response
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def error_status(error):
+    # HTTP status of an HttpError or PersonResponseError, if any
+    status = getattr(error, "status", None)
+    if status is None:
+        status = getattr(getattr(error, "resp", None), "status", None)
+    try:
+        return int(status)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_etag_mismatch(error):
+    # updateContact rejects stale etags with 400 FAILED_PRECONDITION (409 on some paths)
+    return error_status(error) in (400, 409)
+
+
+def is_batch_rejection(error):
+    # 400 for the whole batch request: one bad row poisons it, so sending the rows one
+    # at a time isolates it. Quota, server and network errors would only multiply the
+    # requests (and a create that timed out may already exist), so they are returned
+    # for every row instead.
+    return error_status(error) == 400
+
+
+def person_response_result(response):
+    # Unpack a PersonResponse into (person, PersonResponseError or None)
+    if response is None:
+        return None, PersonResponseError("No result returned for contact")
+    status = response.get("status") or {}
+    http_status = response.get("httpStatusCode", 200)
+    if status.get("code") or http_status >= 400:
+        message = status.get("message") or f"HTTP {http_status}"
+        return None, PersonResponseError(message, http_status)
+    return response.get("person"), None
+
+
+@timed("people.batch_update_birthdays")
+def batch_update_birthdays(service, items):
+    # items: [(contact, birthday_str)] with unique resourceNames, at most BATCH_SIZE.
+    # Returns [(updated person, error)] aligned with items.
+    response = service.people().batchUpdateContacts(body=batch_update_body(items)).execute()
+    return batch_update_results(response, items)
+
+
+def batch_update_body(items):
+    return {
+        "contacts": {
+            contact["resourceName"]: birthday_body(contact, birthday_str)
+            for contact, birthday_str in items
+        },
+        "updateMask": "birthdays",
+        "readMask": "names,birthdays,metadata",
+    }
+
+
+def batch_update_results(response, items):
+    results = response.get("updateResult", {})
+    return [person_response_result(results.get(contact["resourceName"])) for contact, _ in items]
+
+
+@timed("people.batch_create_contacts")
+def batch_create_contacts(service, items):
+    # items: [(name, birthday_str)], at most BATCH_SIZE.
+    # Returns [(created person, error)] aligned with items.
+    response = service.people().batchCreateContacts(body=batch_create_body(items)).execute()
+    return batch_create_results(response, items)
+
+
+def batch_create_body(items):
+    return {
+        "contacts": [
+            {"contactPerson": contact_body(name, birthday_str)} for name, birthday_str in items
+        ],
+        "readMask": "names,birthdays,metadata",
+    }
+
+
+def batch_create_results(response, items):
+    created = response.get("createdPeople", [])
+    return [
+        person_response_result(created[i] if i < len(created) else None)
+        for i in range(len(items))
+    ]
+
+
+def create_contacts(service, items):
+    # items: [(name, birthday_str)], at most BATCH_SIZE; returns [(person, error)].
+    # If the whole batch is rejected, retry one row at a time to isolate the failure.
+    try:
+        return batch_create_contacts(service, items)
+    except Exception as e:
+        if not is_batch_rejection(e):
+            return [(None, e)] * len(items)
+        results = []
+        for name, birthday_str in items:
+            try:
+                results.append((create_contact(service, name, birthday_str), None))
+            except Exception as e:
+                results.append((None, e))
+        return results
+
+
+class ContactStore:
+    # In-memory contacts keyed by resourceName; keeps etags current between updates.
+    # by_name maps each displayName to every contact carrying it, in load order, and
+    # fetched records when each contact was last read from the API (for the TTL).
+
+    def __init__(self, contacts=(), ttl=DETAILS_TTL, clock=time.monotonic):
+        self.by_resource = {}
+        self.by_name = defaultdict(list)
+        self.fetched = {}
+        self.ttl = ttl
+        self.clock = clock
+        self.add(contacts)
+
+    def __len__(self):
+        return len(self.by_resource)
+
+    def __contains__(self, resource_name):
+        return resource_name in self.by_resource
+
+    def get(self, resource_name):
+        return self.by_resource.get(resource_name)
+
+    def resources(self, name):
+        # resourceNames of the contacts displayed as `name`
+        return list(self.by_name.get(name, ()))
+
+    def label(self, resource_name):
+        # Display name, qualified by the contact id when the name is shared
+        name = display_name(self.by_resource.get(resource_name, {})) or resource_name
+        if len(self.by_name.get(name, ())) > 1:
+            return f"{name} [{resource_name.rsplit('/', 1)[-1]}]"
+        return name
+
+    def _index(self, contact):
+        name = display_name(contact)
+        if name is not None:
+            self.by_name[name].append(contact["resourceName"])
+
+    def _unindex(self, contact):
+        name = display_name(contact)
+        resources = self.by_name.get(name)
+        if resources and contact["resourceName"] in resources:
+            resources.remove(contact["resourceName"])
+            if not resources:
+                del self.by_name[name]
+
+    def add(self, contacts):
+        # Returns display names seen for the first time, in order
+        new_names = []
+        for contact in contacts:
+            previous = self.by_resource.get(contact["resourceName"])
+            if previous is not None:
+                self._unindex(previous)
+            self.by_resource[contact["resourceName"]] = contact
+            # Loaded contacts come from a just-synced cache or listing
+            self.fetched[contact["resourceName"]] = self.clock()
+            name = display_name(contact)
+            if name is not None and name not in self.by_name:
+                new_names.append(name)
+            self._index(contact)
+        return new_names
+
+    def put(self, person):
+        # Merge fresh API data into the stored dict so existing references see it
+        fresh = slim_contact(person)
+        etag = contact_etag(person)
+        if etag:
+            fresh["etag"] = etag
+        contact = self.by_resource.get(fresh["resourceName"])
+        if contact is None:
+            self.by_resource[fresh["resourceName"]] = contact = fresh
+        else:
+            self._unindex(contact)
+            contact.update(fresh)
+        self._index(contact)
+        self.fetched[fresh["resourceName"]] = self.clock()
+        return contact
+
+    def is_fresh(self, resource_name, max_age=None):
+        fetched = self.fetched.get(resource_name)
+        max_age = self.ttl if max_age is None else max_age
+        return fetched is not None and self.clock() - fetched < max_age
+
+    def refetch(self, service, resource_name):
+        return self.put(get_contact_details(service, resource_name))
+
+    def stale(self, resource_names, max_age=None):
+        # Unique names not fetched within max_age (default: the TTL)
+        return [rn for rn in dict.fromkeys(resource_names) if not self.is_fresh(rn, max_age)]
+
+    def refresh(self, service, resource_names, max_age=None):
+        # Re-read every contact older than max_age (default: the TTL) with getBatchGet;
+        # returns how many were requested
+        stale = self.stale(resource_names, max_age)
+        for person in get_contacts_batch(service, stale).values():
+            self.put(person)
+        return len(stale)
+
+    def update_birthday(self, service, resource_name, birthday_str, refetch=False):
+        # Use the stored etag optimistically; refetch only when the API says it is stale
+        contact = self.get(resource_name)
+        if contact is None or refetch:
+            contact = self.refetch(service, resource_name)
+        try:
+            person = update_birthday(service, contact, birthday_str)
+        except Exception as e:
+            if refetch or not is_etag_mismatch(e):
+                raise
+            contact = self.refetch(service, resource_name)
+            person = update_birthday(service, contact, birthday_str)
+        return self.put(person)
+
+    def _update_one(self, service, resource_name, birthday_str, refetch=False):
+        try:
+            return self.update_birthday(service, resource_name, birthday_str, refetch), None
+        except Exception as e:
+            return None, e
+
+    def with_etags(self, items):
+        # [(resource_name, birthday_str)] -> [(stored contact, birthday_str)]
+        return [(self.get(rn) or {"resourceName": rn}, b) for rn, b in items]
+
+    def apply_batch(self, results):
+        # Store the people a batch update returned. Returns (rows, stale): rows aligned
+        # with results as [(person, error)], None where the stored etag was out of date,
+        # and stale the positions of those rows.
+        rows = []
+        stale = []
+        for i, (person, error) in enumerate(results):
+            if error is None:
+                rows.append((self.put(person), None))
+            elif is_etag_mismatch(error):
+                rows.append(None)
+                stale.append(i)
+            else:
+                rows.append((None, error))
+        return rows, stale
+
+    def update_birthdays(self, service, items):
+        # items: [(resource_name, birthday_str)] with unique resource names, at most
+        # BATCH_SIZE; returns [(person, error)] aligned with items
+        try:
+            results = batch_update_birthdays(service, self.with_etags(items))
+        except Exception as e:
+            if not is_batch_rejection(e):
+                return [(None, e)] * len(items)
+            # Whole request rejected: retry one row at a time to isolate the failure
+            return [self._update_one(service, rn, birthday_str) for rn, birthday_str in items]
+        rows, stale = self.apply_batch(results)
+        if stale:
+            # Stored etags were out of date: re-read those contacts in one getBatchGet and
+            # retry them in one more batch
+            retry = [items[i] for i in stale]
+            try:
+                self.refresh(service, [rn for rn, _ in retry], max_age=0)
+                retried = batch_update_birthdays(service, self.with_etags(retry))
+            except Exception as e:
+                if is_batch_rejection(e):
+                    retried = [self._update_one(service, rn, b, refetch=True) for rn, b in retry]
+                else:
+                    retried = [(None, e)] * len(retry)
+            else:
+                retried = [(self.put(p), None) if e is None else (None, e) for p, e in retried]
+            for i, result in zip(stale, retried):
+                rows[i] = result
+        return rows
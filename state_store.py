@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+
+from metrics import METRICS
+
+# pandas is imported on first use so the desktop app can open its window before it loads
+
+CSV_PATH = "./calendar.csv"
+COLUMNS = ["Title", "Start", "done", "removed"]
+# A title recurs every year and many people share a date, so both are held as
+# categoricals: each distinct string once plus a small integer code per row. Start stays
+# the ISO "YYYY-MM-DD" text that the journal, the .ics dedupe and the API all key on.
+CATEGORY_COLUMNS = ["Title", "Start"]
+
+
+def normalize_frame(df):
+    # Ensure required columns exist and fill missing values
+    for col in CATEGORY_COLUMNS:
+        if col not in df.columns:
+            df[col] = ""
+        if df[col].dtype != "category":
+            df[col] = df[col].astype("category")
+    for col in ["done", "removed"]:
+        if col not in df.columns:
+            df[col] = False
+        df[col] = df[col].fillna(False).astype(bool)
+    return df
+
+
+def read_csv(csv_path):
+    import pandas as pd
+
+    if not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0:
+        return normalize_frame(pd.DataFrame(columns=COLUMNS))
+    # Parse straight into categoricals rather than one Python string per cell
+    return normalize_frame(
+        pd.read_csv(csv_path, dtype={col: "category" for col in CATEGORY_COLUMNS})
+    )
+
+
+def write_csv(df, csv_path):
+    # Write to a temporary file first so a crash can't leave a truncated CSV
+    tmp_path = f"{csv_path}.tmp"
+    with METRICS.timer("state.write_csv"):
+        df.to_csv(tmp_path, index=False)
+        with open(tmp_path, "rb+") as f:
+            os.fsync(f.fileno())
+        METRICS.add_bytes("state.write_csv", os.path.getsize(tmp_path))
+        os.replace(tmp_path, csv_path)
+
+
+def pending_mask(df):
+    # Rows still waiting for an action
+    return ~(df["done"] | df["removed"])
+
+
+def repeated_titles(df):
+    # Titles that appear with more than one Start date (done and removed rows included)
+    counts = df.groupby("Title", observed=True)["Start"].nunique()
+    return set(counts.index[counts > 1])
+
+
+def add_rows(df, rows):
+    import pandas as pd
+
+    new_rows = [
+        {"Title": r["Title"], "Start": r["Start"], "done": False, "removed": False} for r in rows
+    ]
+    return normalize_frame(pd.concat([df, pd.DataFrame(new_rows)], ignore_index=True))
+
+
+class CsvStateStore:
+    # Rewrites the whole CSV on every change; kept for small files and as a fallback
+
+    def __init__(self, csv_path=CSV_PATH):
+        self.csv_path = csv_path
+
+    def load(self):
+        df = read_csv(self.csv_path)
+        write_csv(df, self.csv_path)
+        return df
+
+    def mark(self, df, indices, column):
+        # Set `column` to True for the given rows and persist
+        df.loc[list(indices), column] = True
+        write_csv(df, self.csv_path)
+
+    def append_rows(self, df, rows):
+        # Returns the DataFrame with `rows` appended as pending
+        df = add_rows(df, rows)
+        write_csv(df, self.csv_path)
+        return df
+
+    def compact(self, df):
+        write_csv(df, self.csv_path)
+
+    def close(self):
+        pass
+
+
+class JournalStateStore:
+    # calendar.csv plus an append-only journal of row transitions. Each change is one
+    # appended line, so persisting a row costs the same however large the CSV is; the
+    # journal is folded back into the CSV on load and on exit.
+
+    def __init__(self, csv_path=CSV_PATH, journal_path=None):
+        self.csv_path = csv_path
+        self.journal_path = journal_path or f"{csv_path}.journal"
+        self.lock = threading.Lock()
+        self.journal = None
+
+    def load(self):
+        df = read_csv(self.csv_path)
+        if os.path.exists(self.journal_path):
+            df = self._replay(df)
+        # Fold the previous session's journal in and start a fresh one
+        self.compact(df)
+        return df
+
+    def _replay(self, df):
+        seen = set(zip(df["Title"], df["Start"]))
+        new_rows = []
+        marks = []
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn final line from a crash mid-write
+                    continue
+                if record.get("op") == "set":
+                    marks.append((record["idx"], record["col"]))
+                elif record.get("op") == "add":
+                    for row in record["rows"]:
+                        # Replays after an interrupted compaction must not duplicate rows
+                        key = (row["Title"], row["Start"])
+                        if key not in seen:
+                            seen.add(key)
+                            new_rows.append(row)
+        if new_rows:
+            df = add_rows(df, new_rows)
+        for column in {c for _, c in marks}:
+            indices = [idx for idx, c in marks if c == column and idx in df.index]
+            df.loc[indices, column] = True
+        return df
+
+    def _append(self, records):
+        text = "".join(json.dumps(r) + "\n" for r in records)
+        with self.lock, METRICS.timer("state.journal_append"):
+            if self.journal is None:
+                self.journal = open(self.journal_path, "a", encoding="utf-8")
+            self.journal.write(text)
+            self.journal.flush()
+            os.fsync(self.journal.fileno())
+        METRICS.add_bytes("state.journal_append", len(text.encode("utf-8")))
+
+    def mark(self, df, indices, column):
+        # Set `column` to True for the given rows; one journal line per row
+        indices = list(indices)
+        df.loc[indices, column] = True
+        self._append([{"op": "set", "idx": int(idx), "col": column} for idx in indices])
+
+    def append_rows(self, df, rows):
+        # Returns the DataFrame with `rows` appended; one journal record per import
+        rows = [{"Title": r["Title"], "Start": r["Start"]} for r in rows]
+        self._append([{"op": "add", "rows": rows}])
+        return add_rows(df, rows)
+
+    def compact(self, df):
+        # Write the CSV first; a crash before the journal is cleared only replays
+        # idempotent records
+        with self.lock:
+            write_csv(df, self.csv_path)
+            if self.journal is not None:
+                self.journal.close()
+            self.journal = open(self.journal_path, "w", encoding="utf-8")
+
+    def close(self):
+        with self.lock:
+            if self.journal is not None:
+                self.journal.close()
+                self.journal = None
@@ -0,0 +1,53 @@
+import threading
+
+
+class UiEventQueue:
+    # Background threads post UI changes here instead of touching Tk widgets; the Tk
+    # thread drains it on a timer. Progress and status keep only their latest value,
+    # so a long run costs one repaint per tick rather than one Tk call per row.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._progress = None
+        self._status = None
+        self._done = []
+        self._errors = []
+        self._calls = []
+
+    def progress(self, percent):
+        with self.lock:
+            self._progress = percent
+
+    def status(self, text):
+        with self.lock:
+            self._status = text
+
+    def rows_done(self, rows):
+        with self.lock:
+            self._done.extend(rows)
+
+    def error(self, message):
+        with self.lock:
+            self._errors.append(message)
+
+    def call(self, fn, *args):
+        # Run fn(*args) on the draining thread, in posting order
+        with self.lock:
+            self._calls.append((fn, args))
+
+    def drain(self):
+        # Everything posted since the last drain:
+        # {"progress", "status", "done", "errors", "calls"}
+        with self.lock:
+            batch = {
+                "progress": self._progress,
+                "status": self._status,
+                "done": self._done,
+                "errors": self._errors,
+                "calls": self._calls,
+            }
+            self._reset()
+        return batch